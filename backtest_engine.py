@@ -1,22 +1,40 @@
 from utils import *
+from data_cache import *
+from tick_store import *
+from journal import *
+from fills import *
+from orders import *
+from resample import *
+from indicators import indicator_cache
 
 class FinancialData () :
+    # Optional DataCache shared by every instance, e.g. FinancialData.cache = DataCache('data_cache', offline=True)
+    cache = None
 
-    def __init__ (self, ticker, end_date, days_nbr, interval) :
+    def __init__ (self, ticker, end_date, days_nbr, interval, data: pd.DataFrame = None) :
         self.ticker = ticker
         self.days_nbr = days_nbr
         self.end_date = end_date
         self.interval = interval
-        self.data = self.get_data(self.ticker, self.end_date, self.interval)
+        self.store = None
+        if isinstance(data, TickStore) :
+            # Bars stay on disk and are read in chunks by EventBased.iter_chunks, self.data is only a header
+            self.store = data
+            self.data = data.to_frame(0, 0)
+            self.data['log_returns'] = np.empty(0)
+            return
+        if data is not None and 'log_returns' in data.columns :
+            # Already prepared by another FinancialData, copied because strategies add indicator columns
+            self.data = data.copy()
+            return
+        self.data = data.copy() if data is not None else self.get_data(self.ticker, self.end_date, self.interval)
         self.data = self.add_log_returns (self.data)
 
     def get_data (self, ticker, end_date, interval) :
         start_date = self.get_start_date (self.end_date, self.days_nbr)
-        raw_df = yf.download(ticker, start = start_date, end = end_date, interval = interval, auto_adjust = True)
-        if isinstance(raw_df.columns, pd.MultiIndex) :
-            raw_df.columns = raw_df.columns.droplevel(1)
-        clean_df = raw_df[['Open', 'High', 'Low', 'Close', 'Volume']]
-        return clean_df
+        if self.cache is not None :
+            return self.cache.get(ticker, start_date, end_date, interval)
+        return YFinanceProvider().fetch(ticker, start_date, end_date, interval)
 
     def get_start_date (self, end_date, days_nbr) :
         duration = dt.timedelta(days=days_nbr)
@@ -27,6 +45,90 @@ class FinancialData () :
         clean_df.dropna(inplace=True)
         return clean_df
 
+    def _coarse_bars (self, interval, offset=None) -> pd.DataFrame :
+        # Aggregated once per (interval, offset) and kept, later calls reuse it
+        if not hasattr(self, '_coarse') :
+            self._coarse = {}
+        key = (interval, offset)
+        if key not in self._coarse :
+            if self.store is not None :
+                # Chunk by chunk, the whole base series is never loaded
+                aggregator, parts, n = BarAggregator(interval, offset), [], len(self.store)
+                for start in range(0, n, 1_000_000) :
+                    parts.append(aggregator.update_frame(self.store.to_frame(start, min(start + 1_000_000, n))))
+                last = aggregator.flush()
+                if last is not None :
+                    parts.append(pd.DataFrame([last[1]], index=pd.DatetimeIndex([last[0]])))
+                self._coarse[key] = pd.concat(parts)
+            else :
+                self._coarse[key] = resample_bars(self.data, interval, offset)
+        return self._coarse[key]
+
+    def resample (self, interval: str, offset=None) -> pd.DataFrame :
+        '''
+        Coarser bars (e.g. '5m', '1h', '1d') built from this base series instead of another download,
+        with log_returns like self.data, ready for data= of a strategy.
+        '''
+        return self.add_log_returns(self._coarse_bars(interval, offset).copy())
+
+    def add_timeframe (self, interval: str, indicator: str = None, column: str = 'Close', name: str = None,
+                       offset=None, **params) -> str :
+        '''
+        Adds a higher-timeframe column to self.data, read in the loop like any other bar column,
+        e.g. add_timeframe('1d', 'ema', span=20) -> 'ema_20_1d' inside a 5m strategy.
+        - indicator: name in indicators.INDICATORS computed on the coarse column, None for the raw column
+        - each fine bar sees the last coarse bar completed before its own bucket (no look-ahead)
+        Returns the column name, call build_arrays() again if the arrays were already built.
+        '''
+        if self.store is not None :
+            raise ValueError('add_timeframe needs in-memory data, use resample() on a TickStore')
+        coarse = self._coarse_bars(interval, offset)
+        values = coarse[column].to_numpy(dtype=float)
+        if indicator is not None :
+            values = indicator_cache.get(indicator, values, **params)
+        if name is None :
+            name = '_'.join([indicator or column] + [str(v) for v in params.values()] + [interval])
+        context = timeframe_context(self.data.index, pd.DataFrame({name: values}, index=coarse.index), interval, offset)
+        self.data[name] = context[name].to_numpy()
+        return name
+
+class BarArrays () :
+    '''
+    Contiguous NumPy snapshot of a bar DataFrame for fast per-bar access.
+    - every numeric column (OHLCV, indicators) stored as a contiguous array
+    - index kept as the original pandas Index so dates keep their type and timezone,
+      it is only read when an order is executed or printed
+    '''
+
+    def __init__ (self, df: pd.DataFrame) :
+        columns = {}
+        for col in df.columns :
+            if pd.api.types.is_numeric_dtype(df[col]) :
+                columns[col] = np.ascontiguousarray(df[col].to_numpy())
+        self._set(df.index, columns)
+
+    @classmethod
+    def from_arrays (cls, index, columns: dict) :
+        # Wraps existing arrays (e.g. TickStore memmap slices) without copying them
+        bars = cls.__new__(cls)
+        bars._set(index, dict(columns))
+        return bars
+
+    def _set (self, index, columns) :
+        self.index = index
+        self.columns = columns
+        self.open = self.columns['Open']
+        self.close = self.columns['Close']
+
+    def __len__ (self) :
+        return len(self.index)
+
+    def __getitem__ (self, col) :
+        return self.columns[col]
+
+    def __contains__ (self, col) :
+        return col in self.columns
+
 class EventBased (FinancialData) :
     '''
     EventBased class for event‑driven backtesting of trading strategies.
@@ -34,9 +136,13 @@ class EventBased (FinancialData) :
     - Single‑position management (long or short) with entry/exit logic
     - Trade journaling: side, units, entry/exit date & price, PnL, duration
     '''
-    
-    def __init__ (self, ticker: str, end_date: dt.date, days_nbr: int, interval: str, amount: float, allow_negative_balance: bool) :
-        super().__init__(ticker, end_date, days_nbr, interval) 
+    # Optional FillModel (fills.py) for costs and partial fills, None fills whole orders at the next Open
+    fill_model = None
+    # Optional Checkpoint (checkpoint.py) saved every few bars by the in-memory run loops
+    checkpoint = None
+
+    def __init__ (self, ticker: str, end_date: dt.date, days_nbr: int, interval: str, amount: float, allow_negative_balance: bool, data: pd.DataFrame = None) :
+        super().__init__(ticker, end_date, days_nbr, interval, data) 
         self.initial_balance = amount
         self.current_balance = amount
         self.allow_negative_balance = allow_negative_balance
@@ -49,18 +155,183 @@ class EventBased (FinancialData) :
         self.buy_trades = 0 
         self.sell_trades = 0
         self.close_trades = 0 
-        self.trade_performance = {} 
+        self.trade_performance = TradeJournal()
+        self.entry_fees = 0.0
+        self.order_book = OrderBook()
+        self.bars = None
+        self._streamed = None  # bars seen by the last streaming run, None after a batch or store run
+
+    def reset (self, amount: float = None) :
+        # Flat position, empty journal and counters, so the same object (and its indicators) can be run again
+        self.current_balance = self.initial_balance if amount is None else amount
+        self.position = {'side': None, 'units': 0, 'entry_date': None, 'entry_price': None}
+        self.buy_trades = 0
+        self.sell_trades = 0
+        self.close_trades = 0
+        self.trade_performance = TradeJournal()
+        self.entry_fees = 0.0
+        self.order_book = OrderBook()
+
+    def checkpoint_state (self) -> dict :
+        # Everything a run needs to go on from the current bar, the journal is saved apart (see checkpoint.py)
+        return {'current_balance': self.current_balance, 'position': dict(self.position),
+                'buy_trades': self.buy_trades, 'sell_trades': self.sell_trades, 'close_trades': self.close_trades,
+                'entry_fees': self.entry_fees, 'order_book': self.order_book}
+
+    def restore_state (self, state: dict, journal: TradeJournal) :
+        self.current_balance = state['current_balance']
+        self.position = state['position']
+        self.buy_trades = state['buy_trades']
+        self.sell_trades = state['sell_trades']
+        self.close_trades = state['close_trades']
+        self.entry_fees = state['entry_fees']
+        self.order_book = state['order_book']
+        self.trade_performance = journal
+
+    def build_arrays (self) :
+        # Snapshot self.data (with any indicator columns) into NumPy arrays, call again after editing self.data
+        self.bars = BarArrays(self.data)
+        self._streamed = None
+        return self.bars
+
+    def iter_chunks (self, chunk_size: int = 1_000_000) :
+        '''
+        Iterates self.store in chunks, self.bars points to the current chunk.
+        Each chunk ends with the first bar of the next one, so the decision bars are
+        range(len(chunk) - 1) and get_execution_price(i) still reaches bar i+1 at the edge.
+        '''
+        n = len(self.store)
+        self._streamed = None
+        for start in range(0, n - 1, chunk_size) :
+            stop = min(start + chunk_size + 1, n)
+            self.bars = BarArrays.from_arrays(*self.store.read(start, stop))
+            yield self.bars
+
+    def run_stream (self, feed) :
+        '''
+        Streaming mode: feed yields (timestamp, bar) pairs, bar being a mapping with Open/High/Low/Close(/Volume).
+        Bar t is handed to on_bar(0) once bar t+1 has arrived, so orders still fill at the next bar Open.
+        self.bars only holds these two bars, memory does not grow with the feed.
+        '''
+        self._start_stream()
+        for timestamp, bar in feed :
+            self._push_bar(timestamp, bar)
+        self._end_stream()
+
+    async def run_stream_async (self, feed) :
+        # Same as run_stream for an async iterator, e.g. a simulated live feed
+        self._start_stream()
+        async for timestamp, bar in feed :
+            self._push_bar(timestamp, bar)
+        self._end_stream()
+
+    def on_bar (self, ind_nbr) :
+        # Strategy logic for one bar in streaming mode, ind_nbr is always 0 (ind_nbr + 1 is the fill bar)
+        raise NotImplementedError(f'{type(self).__name__} does not support streaming')
+
+    def _start_stream (self) :
+        self.bars = None
+        self._streamed = 0
+
+    def _push_bar (self, timestamp, bar) :
+        if self.bars is None :
+            self.bars = BarArrays.from_arrays([None, timestamp], {col: [np.nan, value] for col, value in bar.items()})
+        else :
+            # Shift the two-bar window in place
+            self.bars.index[0] = self.bars.index[1]
+            self.bars.index[1] = timestamp
+            for col, values in self.bars.columns.items() :
+                values[0] = values[1]
+                values[1] = bar[col]
+        self._streamed += 1
+        if self._streamed >= 2 :
+            if self.order_book :
+                self.process_orders(0)
+            self.on_bar(0)
+
+    def _end_stream (self) :
+        # Close last position at the last bar, like close_position(len(data) - 2) in the batch loop
+        if self.position['side'] is not None and self._streamed >= 2 :
+            self.close_position(0)
+
+    def equity_curve (self, chunk_size: int = 1_000_000) -> pd.DataFrame :
+        '''
+        Bar-level mark-to-market account, rebuilt from the journal after the run (no cost in the loop).
+        - position: signed units held over the bar (entered at an Open, released at the exit Open)
+        - equity: initial balance + realized PnL + open PnL at the bar Close, minus the entry commission
+          of the open position from its entry bar on (recomputed with self.fill_model)
+        - cash: equity minus the market value of the position
+        The trades are located by their entry/exit dates on the sorted bar index. With a TickStore the
+        curve is built chunk_size bars at a time from the memory-mapped columns.
+        Not available after run_stream, which only keeps the last two bars.
+        '''
+        if self._streamed is not None :
+            raise ValueError('equity_curve needs the bars of the run, not available after a streaming run')
+        if self.store is not None :
+            n = len(self.store)
+            dates = self.store.columns['timestamp']
+            read = lambda start, stop : (self.store.index(start, stop), np.asarray(self.store.columns['Close'][start:stop], dtype=float))
+        else :
+            bars = self.bars if self.bars is not None else self.build_arrays()
+            n = len(bars)
+            dates = pd.DatetimeIndex(bars.index).asi8
+            chunk_size = max(n, 1)
+            read = lambda start, stop : (bars.index[start:stop], bars.close[start:stop])
+        rec = self.trade_performance.records
+        signed = rec['side'] * rec['units'].astype(float)
+        entry_price = rec['entry_price']
+        entry_fees = self.fill_model.fees(rec['units'], entry_price) if self.fill_model is not None else np.zeros(len(rec))
+        entries = np.searchsorted(dates, rec['entry_date'])
+        exits = np.searchsorted(dates, rec['exit_date'])
+        if self.position['side'] is not None :
+            # Open position, held until the last bar
+            side = 1 if self.position['side'] == 'long' else -1
+            signed = np.r_[signed, side * self.position['units']]
+            entry_price = np.r_[entry_price, self.position['entry_price']]
+            entry_fees = np.r_[entry_fees, self.entry_fees]
+            entries = np.r_[entries, np.searchsorted(dates, pd.Timestamp(self.position['entry_date']).value)]
+            exits = np.r_[exits, n]
+        realized_sum = np.r_[0.0, np.cumsum(rec['pnl'])]
+
+        parts = []
+        for start in range(0, n, chunk_size) :
+            stop = min(start + chunk_size, n)
+            index, close = read(start, stop)
+            bar = np.arange(start, stop)
+            position = np.zeros(len(bar))
+            open_pnl = np.zeros(len(bar))
+            if len(entries) > 0 :
+                # Single position: the trade held at bar t is the last one entered at or before t, if not exited yet
+                k = np.searchsorted(entries, bar, side='right') - 1
+                held = (k >= 0) & (bar < exits[np.maximum(k, 0)])
+                k = np.maximum(k, 0)
+                position = np.where(held, signed[k], 0.0)
+                open_pnl = np.where(held, position * (close - entry_price[k]) - entry_fees[k], 0.0)
+            realized = realized_sum[np.searchsorted(exits[:len(rec)], bar, side='right')]
+            equity = self.initial_balance + realized + open_pnl
+            parts.append(pd.DataFrame({'equity': equity, 'position': position, 'cash': equity - position * close}, index=index))
+        if not parts :
+            return pd.DataFrame({'equity': [], 'position': [], 'cash': []}, index=pd.DatetimeIndex([]))
+        return parts[0] if len(parts) == 1 else pd.concat(parts)
 
     def get_date_price (self, ind_nbr) : 
-        date = self.data.index[ind_nbr]
-        price = self.data['Close'].iloc[ind_nbr]
-        return date, price
+        bars = self.bars if self.bars is not None else self.build_arrays()
+        return bars.index[ind_nbr], bars.close[ind_nbr]
 
-    def get_execution_price(self, ind_nbr): 
+    def get_execution_price(self, ind_nbr, side=0): 
         # Function used to avoid look ahead bias by taking position at the next period
-        exec_date = self.data.index[ind_nbr + 1]
-        exec_price = self.data['Open'].iloc[ind_nbr + 1]
-        return exec_date, exec_price
+        # side: 1 buy, -1 sell, priced by the fill model when one is set
+        bars = self.bars if self.bars is not None else self.build_arrays()
+        if self.fill_model is None or side == 0:
+            return bars.index[ind_nbr + 1], bars.open[ind_nbr + 1]
+        return bars.index[ind_nbr + 1], self.fill_model.price(bars, ind_nbr + 1, side)
+
+    def _fill_units (self, fill_bar, units, price) :
+        # Units filled and commission of an entry executed at bar fill_bar under the fill model
+        if self.fill_model is None :
+            return units, 0.0
+        units = self.fill_model.units(self.bars, fill_bar, units)
+        return units, (self.fill_model.fees(units, price) if units > 0 else 0.0)
 
     def print_balance (self, ind_nbr) : 
         date, price = self.get_date_price (ind_nbr)
@@ -71,70 +342,253 @@ class EventBased (FinancialData) :
         total_wealth = self.current_balance + self.position['units'] * price
         print(f'Date : {str(date)} | Total Wealth : {total_wealth:.2f}')
 
+    def _log_order (self, ind_nbr, message) :
+        # Only called when INFO logging is enabled, keeps string formatting off the hot path
+        date, price = self.get_date_price (ind_nbr)
+        logger.info(message)
+        logger.info(f'Date : {str(date)} | Account Current Balance : {self.current_balance}')
+        logger.info(f'Date : {str(date)} | Total Wealth : {self.current_balance + self.position["units"] * price:.2f}')
+
     def enter_long (self, ind_nbr, units=None, amount=None) :
-        date, price = self.get_execution_price (ind_nbr)
-        base_amount = amount if amount is not None else self.current_balance
-        if not self.allow_negative_balance and base_amount < price:
-            print(f'[{date}] Not enought capital to enter long')
-            return
-        if units is None:
-            units = max(int(abs(base_amount) / price), 1)
-        self.current_balance -= units * price
-        self.position['side'] = 'long'
-        self.position['units'] = units
-        self.position['entry_date'] = date
-        self.position['entry_price'] = price
-        self.buy_trades += 1
-        print(f'Date : {date} | ORDER = Long : {units} shares at {price}€')
-        self.print_balance (ind_nbr)
-        self.print_wealth (ind_nbr)
+        date, price = self.get_execution_price (ind_nbr, 1)
+        units = self._enter('long', ind_nbr + 1, date, price, units, amount)
+        if units and logger.isEnabledFor(logging.INFO) :
+            self._log_order(ind_nbr, f'Date : {date} | ORDER = Long : {units} shares at {price}€')
 
     def enter_short (self, ind_nbr, units=None, amount=None) : 
-        date, price = self.get_execution_price (ind_nbr)
+        date, price = self.get_execution_price (ind_nbr, -1)
+        units = self._enter('short', ind_nbr + 1, date, price, units, amount)
+        if units and logger.isEnabledFor(logging.INFO) :
+            self._log_order(ind_nbr, f'Date : {str(date)} | ORDER = Short : {units} shares at {price}€')
+
+    def _enter (self, side, fill_bar, date, price, units=None, amount=None) -> int :
+        # Capital check, sizing and fill model shared by market entries and filled pending entries,
+        # returns the units opened (0 when the entry is refused)
         base_amount = amount if amount is not None else self.current_balance
         if not self.allow_negative_balance and base_amount < price:
-            print(f'[{date}] Not enought capital to enter short')
-            return
+            if logger.isEnabledFor(logging.INFO) :
+                logger.info(f'[{date}] Not enought capital to enter {side}')
+            return 0
         if units is None:
             units = max(int(abs(base_amount) / price), 1)
-        self.current_balance += units * price
-        self.position['side'] = 'short'
+        units, fees = self._fill_units(fill_bar, units, price)
+        if units <= 0:
+            if logger.isEnabledFor(logging.INFO) :
+                logger.info(f'[{date}] No volume to enter {side}')
+            return 0
+        self._open_at(side, date, price, units, fees)
+        return units
+    
+    def _open_at (self, side, date, price, units, fees) :
+        if side == 'long':
+            self.current_balance -= units * price
+            self.buy_trades += 1
+        else:
+            self.current_balance += units * price
+            self.sell_trades += 1
+        self.current_balance -= fees
+        self.entry_fees = fees
+        self.position['side'] = side
         self.position['units'] = units
         self.position['entry_date'] = date
         self.position['entry_price'] = price
-        self.sell_trades += 1
-        print(f'Date : {str(date)} | ORDER = Short : {units} shares at {price}€')
-        self.print_balance (ind_nbr)
-        self.print_wealth (ind_nbr)
-    
+
     def close_position (self, ind_nbr) :
-        date, price = self.get_execution_price (ind_nbr)
+        if self.position['side'] is None:
+            raise ValueError('No Open Positions')
+        date, price = self.get_execution_price (ind_nbr, -1 if self.position['side'] == 'long' else 1)
+        self._close_at(date, price)
+
+    def _close_at (self, date, price) :
         self.closing_date = date
         self.closing_price = price
         units = self.position['units']
         entry_price = self.position['entry_price']
+        # PnL net of the entry and exit commissions, the entry one already left the balance
+        fees = self.fill_model.fees(units, price) if self.fill_model is not None else 0.0
         if self.position['side'] == 'long':
             pnl = units * (self.closing_price - entry_price)
-            self.current_balance += pnl
             trade_performance = np.log(self.closing_price / entry_price)
             direction = 'long'
-        elif self.position['side'] == 'short':
+        else:
             pnl = units * (entry_price - self.closing_price)
-            self.current_balance += pnl
             trade_performance = np.log(entry_price / self.closing_price)
             direction = 'short'
-        else:
-            raise ValueError('No Open Positions')
+        self.current_balance += pnl - fees
+        pnl -= self.entry_fees + fees
         self.close_trades += 1
-        duration = self.closing_date - self.position['entry_date']
-        print(f'Date : {str(date)} | Close Position : {units} shares at {self.closing_price}€') 
-        print(f'Perfomance : {trade_performance * 100 :.2f} % | PnL : {pnl:.2f}€ | Capital : {self.current_balance:.2f}€') 
-        # Save every trade performance and details in a dictionnary to help the metrics computing
-        self.trade_performance.update({date : {'Type of trade': direction, 
-                                               'Number of shares': units, 
-                                               'Duration': duration, 
-                                               'Performance [%]': trade_performance *100, 
-                                               'Log Return': trade_performance,
-                                               'PnL': pnl,
-                                               'Capital After Trade': self.current_balance}})
+        if logger.isEnabledFor(logging.INFO) :
+            logger.info(f'Date : {str(date)} | Close Position : {units} shares at {self.closing_price}€')
+            logger.info(f'Perfomance : {trade_performance * 100 :.2f} % | PnL : {pnl:.2f}€ | Capital : {self.current_balance:.2f}€')
+        # Save every trade in the columnar journal to help the metrics computing
+        self.trade_performance.append(self.position['entry_date'], date, 1 if direction == 'long' else -1, units,
+                                      entry_price, self.closing_price, trade_performance, pnl, self.current_balance,
+                                      self.entry_fees + fees)
+        self.entry_fees = 0.0
         self.position = {'side': None, 'units': 0, 'entry_date': None, 'entry_price': None} # Reset position
+        if self.order_book:
+            # Stop-loss / take-profit belong to the closed position
+            self.order_book.cancel_exits()
+
+    def place_order (self, kind: str, side: int, price: float, units: int = None,
+                     stop_loss: float = None, take_profit: float = None) -> int :
+        '''
+        Resting order checked from the next bar on against its High/Low (see process_orders).
+        - kind 'limit' / 'stop' with side 1 (buy) or -1 (sell) opens a position when flat,
+          units defaults to the whole balance like enter_long/enter_short
+        - stop_loss / take_profit: exit prices attached to the position opened by the order
+        Returns the order id, for cancel_order.
+        '''
+        return self.order_book.add(kind, side, price, units, stop_loss, take_profit)
+
+    def cancel_order (self, order_id: int) :
+        self.order_book.cancel(order_id)
+
+    def set_stop_loss (self, price: float) :
+        self._set_exit('stop_loss', price)
+
+    def set_take_profit (self, price: float) :
+        self._set_exit('take_profit', price)
+
+    def _set_exit (self, kind, price) :
+        # Replaces the current stop-loss / take-profit of the open position
+        if self.position['side'] is None:
+            raise ValueError('No Open Positions')
+        for order_id in [k for k, order in self.order_book.orders.items() if order['kind'] == kind]:
+            self.order_book.cancel(order_id)
+        self.order_book.add(kind, -1 if self.position['side'] == 'long' else 1, price)
+
+    def process_orders (self, ind_nbr) :
+        '''
+        Fills the resting orders that bar ind_nbr traded through, called by the strategy loops
+        before deciding on that bar. Orders placed while deciding on bar i are first checked on
+        bar i+1, and exits attached by an entry filled on a bar are first checked on the next one.
+        Entries only fill when flat, otherwise they stay in the book. A filled entry goes through the
+        capital check and fill model of enter_long / enter_short, it is cancelled when refused.
+        '''
+        bars = self.bars
+        open_, low, high = bars.open[ind_nbr], bars['Low'][ind_nbr], bars['High'][ind_nbr]
+        date = bars.index[ind_nbr]
+        book = self.order_book
+        for order in book.triggered(low, high):
+            if order['id'] not in book.orders:
+                continue  # cancelled by an exit filled before it on this bar
+            if order['kind'] in EXIT_KINDS:
+                if self.position['side'] is not None:
+                    book.cancel(order['id'])
+                    self._close_at(date, book.fill_price(order, open_))
+                continue
+            if self.position['side'] is not None:
+                continue
+            price = book.fill_price(order, open_)
+            book.cancel(order['id'])
+            # Same capital check, sizing and volume cap as a market order, a refused entry is cancelled
+            units = self._enter('long' if order['side'] == 1 else 'short', ind_nbr, date, price, order['units'])
+            if not units:
+                continue
+            if logger.isEnabledFor(logging.INFO):
+                self._log_order(ind_nbr, f'Date : {date} | ORDER = {order["kind"]} {"Long" if order["side"] == 1 else "Short"} : {units} shares at {price}€')
+            if order['stop_loss'] is not None:
+                self.set_stop_loss(order['stop_loss'])
+            if order['take_profit'] is not None:
+                self.set_take_profit(order['take_profit'])
+
+    def run_vectorized (self, target_positions, start: int = 0, stop: int = None) :
+        '''
+        Fast path for stateless strategies, same journal as the event loop.
+        - target_positions[i]: position wanted after bar start + i (1 long, -1 short, 0 flat, NaN keep current)
+        - start/stop: only bars [start, stop) are traded, the position is closed at the Open of bar stop - 1
+        - orders are filled at the next bar Open, like get_execution_price
+        - sizing mirrors enter_long/enter_short(i, amount=self.current_balance)
+        - with a fill model, buy/sell prices and volume caps are computed for every bar as arrays
+        Position changes are found with NumPy, only the trades themselves are walked
+        because each size depends on the balance left by the previous trade.
+        '''
+        if self.position['side'] is not None:
+            raise ValueError('run_vectorized requires a flat position')
+        if self.order_book:
+            raise ValueError('run_vectorized does not handle pending orders, use the event loop')
+        bars = self.build_arrays()
+        stop = len(bars) if stop is None else stop
+        n = stop - start
+        index = bars.index[start:stop]
+        fill_model = self.fill_model
+        if fill_model is None:
+            buy = sell = bars.open[start:stop]
+            cap = None
+        else:
+            rows = np.arange(start, stop)
+            buy = np.asarray(fill_model.price(bars, rows, 1), dtype=float)
+            sell = np.asarray(fill_model.price(bars, rows, -1), dtype=float)
+            cap = fill_model.max_units(bars, rows)
+        target = np.asarray(target_positions, dtype=float)[:n - 1]
+        if len(target) == 0:
+            return self.trade_performance
+
+        # Forward fill NaN (keep current position), leading NaN means flat
+        last_set = np.where(np.isnan(target), 0, np.arange(len(target)))
+        wanted = target[np.maximum.accumulate(last_set)]
+        wanted = np.sign(np.nan_to_num(wanted))
+        changes = np.flatnonzero(np.diff(wanted, prepend=0.0))
+
+        balance = self.current_balance
+        side, units, entry_exec, entry_price, entry_fees = 0, 0, None, None, 0.0
+        sides, shares, entries, exits, pnls, capital = [], [], [], [], [], []
+        entry_prices, exit_prices, fees = [], [], []
+
+        def close (exit_exec) :
+            nonlocal balance
+            exit_price = sell[exit_exec] if side == 1 else buy[exit_exec]
+            exit_fees = fill_model.fees(units, exit_price) if fill_model is not None else 0.0
+            pnl = units * (exit_price - entry_price) if side == 1 else units * (entry_price - exit_price)
+            balance += pnl - exit_fees
+            sides.append(side); shares.append(units); entries.append(entry_exec); exits.append(exit_exec)
+            entry_prices.append(entry_price); exit_prices.append(exit_price); fees.append(entry_fees + exit_fees)
+            pnls.append(pnl - (entry_fees + exit_fees)); capital.append(balance)
+
+        for k, c in enumerate(changes):
+            end = changes[k + 1] if k + 1 < len(changes) else len(wanted)
+            if side != 0:
+                close(c + 1)
+                side = 0
+            if wanted[c] == 0:
+                continue
+            prices = buy if wanted[c] == 1 else sell
+            j = c
+            if not self.allow_negative_balance or cap is not None:
+                # An entry refused for lack of capital or volume is retried on every bar of the run
+                fillable = np.ones(end - c, dtype=bool)
+                if not self.allow_negative_balance:
+                    fillable &= ~(balance < prices[c + 1:end + 1])
+                if cap is not None:
+                    fillable &= cap[c + 1:end + 1] >= 1
+                fillable = np.flatnonzero(fillable)
+                if len(fillable) == 0:
+                    continue
+                j = c + fillable[0]
+            entry_price = prices[j + 1]
+            units = max(int(abs(balance) / entry_price), 1)
+            if cap is not None:
+                units = int(min(units, cap[j + 1]))
+            entry_fees = fill_model.fees(units, entry_price) if fill_model is not None else 0.0
+            side = int(wanted[c])
+            balance = balance - units * entry_price if side == 1 else balance + units * entry_price
+            balance -= entry_fees
+            entry_exec = j + 1
+            if side == 1:
+                self.buy_trades += 1
+            else:
+                self.sell_trades += 1
+        # Close last position at the last executable bar
+        if side != 0:
+            close(n - 1)
+
+        entries, exits = np.asarray(entries, dtype=int), np.asarray(exits, dtype=int)
+        sides = np.asarray(sides)
+        entry_prices, exit_prices = np.asarray(entry_prices, dtype=float), np.asarray(exit_prices, dtype=float)
+        log_returns = np.where(sides == 1, np.log(exit_prices / entry_prices), np.log(entry_prices / exit_prices))
+        self.trade_performance.extend(index[entries], index[exits], sides, shares,
+                                      entry_prices, exit_prices, log_returns, pnls, capital, fees)
+        self.close_trades += len(exits)
+        self.current_balance = balance
+        return self.trade_performance
@@ -0,0 +1,120 @@
+'''
+Batched ARIMA(p, d, 0) estimation for many windows or tickers at once.
+Each window is fitted by conditional least squares, all windows solved together with
+batched NumPy normal equations instead of one statsmodels fit per window.
+Orders outside p >= 0, d in (0, 1), q = 0 fall back to statsmodels.
+'''
+
+from utils import *
+from statistics import NormalDist
+
+def batch_supported (order) -> bool :
+    p, d, q = order
+    return q == 0 and d in (0, 1) and p >= 0
+
+def _design (z: np.ndarray, p: int, const: bool) :
+    # Regressors (m, n - p, k) and targets (m, n - p) of AR(p) on every row of z
+    m, n = z.shape
+    cols = [z[:, p - k - 1:n - k - 1] for k in range(p)]
+    if const :
+        cols = [np.ones((m, n - p))] + cols
+    X = np.stack(cols, axis=2) if cols else np.zeros((m, n - p, 0))
+    return X, z[:, p:]
+
+def batch_fit (windows, order=(1, 0, 0)) -> tuple :
+    '''
+    Conditional least squares fit of ARIMA(p, d, 0) on every row of windows (m, w).
+    Like statsmodels ARIMA, d = 0 has a constant and d = 1 has none.
+    Returns (params (m, k), sigma2 (m,)): params are [const,] phi_1..phi_p, NaN for degenerate windows.
+    '''
+    p, d, q = order
+    if not batch_supported(order) :
+        raise ValueError(f'batch_fit supports ARIMA(p, 0|1, 0), got {order}')
+    windows = np.atleast_2d(np.asarray(windows, dtype=float))
+    z = np.diff(windows, axis=1) if d else windows
+    X, target = _design(z, p, const=(d == 0))
+    k = X.shape[2]
+    if target.shape[1] <= k or windows.shape[1] < max(5, p + q + 1) :
+        return np.full((len(windows), k), np.nan), np.full(len(windows), np.nan)
+    XtX = np.einsum('mti,mtj->mij', X, X)
+    Xty = np.einsum('mti,mt->mi', X, target)
+    # Singular systems (e.g. a constant window) are solved on the identity and flagged NaN
+    if k :
+        with np.errstate(divide='ignore', invalid='ignore') :
+            cond = np.linalg.cond(XtX)
+        bad = ~(cond < 1e12)
+        XtX[bad] = np.eye(k)
+        params = np.linalg.solve(XtX, Xty[..., None])[..., 0]
+    else :
+        bad = np.zeros(len(X), dtype=bool)
+        params = np.zeros((len(X), 0))
+    resid = target - np.einsum('mti,mi->mt', X, params)
+    sigma2 = np.mean(resid ** 2, axis=1)
+    params[bad] = np.nan
+    sigma2[bad] = np.nan
+    return params, sigma2
+
+def _forecast (params, sigma2, lags, last, d, alpha) :
+    # One-step mean and (1 - alpha) interval from params and the p latest values of the modelled series
+    p = lags.shape[1]
+    mean = np.einsum('mi,mi->m', params[:, -p:], lags) if p else np.zeros(len(params))
+    if d == 0 :
+        mean = mean + params[:, 0]
+    else :
+        mean = mean + last
+    half = NormalDist().inv_cdf(1 - alpha / 2) * np.sqrt(sigma2)
+    return mean, mean - half, mean + half
+
+def _statsmodels_forecast (windows, order, alpha) :
+    # Fallback, one statsmodels fit per window
+    from ema_arima import arima_forecast, fit_arima
+    out = np.full((3, len(windows)), np.nan)
+    for k, y in enumerate(windows) :
+        try :
+            res = fit_arima(y, order)
+            out[:, k] = arima_forecast(res, alpha)
+        except Exception as e :
+            logger.warning(f'[WARN] ARIMA fit error on window {k}: {e}')
+    return out[0], out[1], out[2]
+
+def batch_forecast (windows, order=(1, 0, 0), alpha: float = 0.2) -> tuple :
+    '''
+    One-step forecast mean, lower and upper bounds for every row of windows (m, w),
+    e.g. the same window of many tickers or many windows of one series (see rolling_windows).
+    Same outputs as ArimaTickStrategy._fit_model, NaN where a window can not be fitted; conditional least
+    squares is not the statsmodels MLE, expect differences of a few percent of the return std on short windows.
+    '''
+    windows = np.atleast_2d(np.asarray(windows, dtype=float))
+    if not batch_supported(order) :
+        return _statsmodels_forecast(windows, order, alpha)
+    p, d, q = order
+    params, sigma2 = batch_fit(windows, order)
+    z = np.diff(windows, axis=1) if d else windows
+    lags = z[:, ::-1][:, :p]
+    return _forecast(params, sigma2, lags, windows[:, -1], d, alpha)
+
+def rolling_windows (y: np.ndarray, window: int, ends) -> np.ndarray :
+    # Rows y[end - window + 1:end + 1] for every end, as a read-only strided view (no copy)
+    ends = np.asarray(ends, dtype=int)
+    view = np.lib.stride_tricks.sliding_window_view(np.asarray(y, dtype=float), window)
+    return view[ends - window + 1]
+
+def rolling_forecast (y: np.ndarray, window: int, refit_every: int, start: int, stop: int,
+                      order=(1, 0, 0), alpha: float = 0.2) -> tuple :
+    '''
+    Forecasts at every bar of [start, stop) the way ArimaTickStrategy runs: parameters fitted on
+    the window ending at start, start + refit_every, ... and applied unchanged to the bars until
+    the next refit (like res.extend). All refits are one batch_fit call.
+    Returns (mean, lower, upper) arrays of length stop - start and the number of refits.
+    '''
+    p, d, q = order
+    y = np.asarray(y, dtype=float)
+    bars = np.arange(start, stop)
+    refits = np.arange(start, stop, refit_every)
+    params, sigma2 = batch_fit(rolling_windows(y, window, refits), order)
+    block = (bars - start) // refit_every
+    z = np.diff(y, prepend=np.nan) if d else y
+    # p latest values of the modelled series at every bar, newest first
+    lags = np.stack([z[bars - k] for k in range(p)], axis=1) if p else np.zeros((len(bars), 0))
+    mean, lower, upper = _forecast(params[block], sigma2[block], lags, y[bars], d, alpha)
+    return mean, lower, upper, len(refits)
@@ -0,0 +1,197 @@
+'''
+Benchmarks for the backtest hot path on synthetic offline data.
+'''
+
+from utils import *
+from backtest_engine import *
+from ema_arima import *
+from tradeanalysis import *
+from profiling import *
+from indicators import indicator_cache
+import argparse
+import contextlib
+import io
+import os
+import subprocess
+import sys
+import time
+import tracemalloc
+
+HEAVY_MODULES = ['matplotlib', 'yfinance', 'quantstats', 'sklearn', 'statsmodels']
+
+def synthetic_bars (n: int, seed: int = 0, freq: str = 'min') -> pd.DataFrame :
+    # Geometric random walk with OHLCV columns, same layout as FinancialData.get_data
+    rng = np.random.default_rng(seed)
+    index = pd.date_range('2020-01-01', periods=n, freq=freq)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.001, n)))
+    open_ = close * np.exp(rng.normal(0, 0.0003, n))
+    high = np.maximum(open_, close) * (1 + np.abs(rng.normal(0, 0.0005, n)))
+    low = np.minimum(open_, close) * (1 - np.abs(rng.normal(0, 0.0005, n)))
+    volume = rng.integers(100, 10_000, n).astype(float)
+    return pd.DataFrame({'Open': open_, 'High': high, 'Low': low, 'Close': close, 'Volume': volume}, index=index)
+
+def bench_bar_access (n: int = 200_000) -> dict :
+    '''
+    Per-bar cost of the reads done by EmaCrossStrategy.run_backtest:
+    two indicator values, the bar Close and the next bar Open.
+    '''
+    df = synthetic_bars(n)
+    df['ema_short'] = df['Close'].ewm(span=20, adjust=False).mean()
+    df['ema_long'] = df['Close'].ewm(span=50, adjust=False).mean()
+
+    start = time.perf_counter()
+    for i in range(n - 1):
+        df['ema_short'].iloc[i] > df['ema_long'].iloc[i]
+        df['Close'].iloc[i], df['Open'].iloc[i + 1]
+    pandas_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    bars = BarArrays(df)
+    build_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    ema_short, ema_long = bars['ema_short'], bars['ema_long']
+    for i in range(n - 1):
+        ema_short[i] > ema_long[i]
+        bars.close[i], bars.open[i + 1]
+    array_time = time.perf_counter() - start
+
+    return {
+        'bars': n,
+        'pandas_us_per_bar': pandas_time / (n - 1) * 1e6,
+        'arrays_us_per_bar': array_time / (n - 1) * 1e6,
+        'arrays_build_ms': build_time * 1e3,
+        'speedup': pandas_time / array_time,
+    }
+
+def bench_startup (modules: str = 'backtest_engine, ema_arima, tradeanalysis') -> dict :
+    '''
+    Import time and peak RSS of a fresh interpreter importing the engine,
+    i.e. what every process-pool worker pays before its first backtest.
+    '''
+    code = (
+        'import time, resource, sys\n'
+        't0 = time.perf_counter()\n'
+        f'import {modules}\n'
+        'elapsed = time.perf_counter() - t0\n'
+        f'heavy = [m for m in {HEAVY_MODULES!r} if m in sys.modules]\n'
+        'print(elapsed, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss, ",".join(heavy))\n'
+    )
+    # Run from the package directory so the engine modules are found wherever the suite is started from
+    out = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True,
+                         cwd=os.path.dirname(os.path.abspath(__file__))).stdout.split(' ')
+    return {
+        'modules': modules,
+        'import_s': float(out[0]),
+        'peak_rss_mb': int(out[1]) / 1024,
+        'heavy_loaded': out[2].strip() or 'none',
+    }
+
+def _measure (fn, trace_memory: bool = True, before=None) :
+    '''
+    Wall time of fn() and, with trace_memory, its peak traced allocation (NumPy buffers included)
+    measured on a second call, so the tracemalloc bookkeeping does not slow the timed call down.
+    before() runs untimed ahead of each call, e.g. to reset a strategy.
+    '''
+    if before is not None :
+        before()
+    start = time.perf_counter()
+    fn()
+    elapsed = time.perf_counter() - start
+    peak = np.nan
+    if trace_memory :
+        if before is not None :
+            before()
+        tracemalloc.start()
+        try :
+            fn()
+            peak = tracemalloc.get_traced_memory()[1]
+        finally :
+            tracemalloc.stop()
+    return elapsed, peak
+
+def bench_suite (sizes: tuple = (10_000, 1_000_000, 10_000_000), arima_bars: int = 1_000,
+                 trace_memory: bool = True, seed: int = 0) -> pd.DataFrame :
+    '''
+    Reproducible end-to-end benchmark on synthetic minute bars, one row per (size, phase):
+    - ema_init / ema_loop / ema_vectorized: EmaCrossStrategy construction and both run modes
+    - journal_append / journal_extend: TradeJournal writes, one record per bar
+    - report: TradeAnalysis metrics and report() on the EMA journal
+    - arima_loop: ArimaTickStrategy on the first arima_bars bars (statsmodels fits dominate),
+      only run once per distinct bar count
+    bars_per_s is computed on the bars of the phase, peak_mb is the tracemalloc peak of the phase.
+    '''
+    rows, arima_done = [], set()
+
+    def record (size, phase, bars, timing) :
+        elapsed, peak = timing
+        rows.append({'size': size, 'phase': phase, 'bars': bars, 'seconds': elapsed,
+                     'bars_per_s': bars / elapsed if elapsed > 0 else np.nan, 'peak_mb': peak / 2**20})
+
+    kwargs = dict(ticker='SYN', end_date=dt.date(2020, 1, 1), days_nbr=0, interval='1m', amount=10_000)
+    for size in sizes :
+        df = synthetic_bars(size, seed)
+        record(size, 'ema_init', size, _measure(lambda: EmaCrossStrategy(data=df, **kwargs), trace_memory,
+                                                before=indicator_cache.clear))
+        strategy = EmaCrossStrategy(data=df, **kwargs)
+        record(size, 'ema_loop', size, _measure(strategy.run_backtest, trace_memory, before=strategy.reset))
+        record(size, 'ema_vectorized', size, _measure(lambda: strategy.run_backtest(vectorized=True), trace_memory,
+                                                      before=strategy.reset))
+
+        dates = df.index
+        ones = np.ones(size - 1)
+        stamps = dates.asi8.tolist()
+
+        def append () :
+            journal = TradeJournal()
+            for i in range(size - 1) :
+                journal.append(stamps[i], stamps[i + 1], 1, 1, 1.0, 1.0, 0.0, 0.0, 0.0)
+        record(size, 'journal_append', size, _measure(append, trace_memory))
+        record(size, 'journal_extend', size, _measure(
+            lambda: TradeJournal().extend(dates[:-1], dates[1:], ones, ones, ones, ones, ones, ones, ones), trace_memory))
+
+        def report () :
+            ta = TradeAnalysis(strategy.trade_performance, 10_000, 0, 0, strategy.data['Close'])
+            with contextlib.redirect_stdout(io.StringIO()) :
+                ta.report()
+        record(size, 'report', len(strategy.trade_performance), _measure(report, trace_memory))
+
+        n = min(size, arima_bars)
+        if n not in arima_done :
+            arima_done.add(n)
+            arima = ArimaTickStrategy(data=df.iloc[:n], window=200, refit_every=10, **kwargs)
+            record(size, 'arima_loop', n, _measure(arima.run_backtest, trace_memory, before=arima.reset))
+    return pd.DataFrame(rows)
+
+def profile_run (strategy, **run_kwargs) -> pd.DataFrame :
+    # Runs strategy.run_backtest(**run_kwargs) with the profiling hooks attached, per-method calls and timings
+    profiler = Profiler()
+    profiler.attach(strategy)
+    try :
+        strategy.run_backtest(**run_kwargs)
+    finally :
+        profiler.detach(strategy)
+    return profiler.stats()
+
+if __name__ == '__main__' :
+    parser = argparse.ArgumentParser(description='Backtest benchmarks on synthetic data')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10_000, 1_000_000],
+                        help='bar counts for the suite, e.g. --sizes 10000 1000000 10000000')
+    parser.add_argument('--no-memory', action='store_true', help='plain timings, without tracemalloc')
+    args = parser.parse_args()
+
+    print('=== Startup ===')
+    for key, value in bench_startup().items() :
+        print(f'{key}: {value:.3f}' if isinstance(value, float) else f'{key}: {value}')
+
+    print('=== Bar access ===')
+    for key, value in bench_bar_access().items() :
+        print(f'{key}: {value:.3f}' if isinstance(value, float) else f'{key}: {value}')
+
+    print('=== Suite ===')
+    with pd.option_context('display.width', 120, 'display.float_format', '{:,.3f}'.format) :
+        print(bench_suite(tuple(args.sizes), trace_memory=not args.no_memory).to_string(index=False))
+
+    print('=== Profile (EmaCrossStrategy, 100k bars) ===')
+    print(profile_run(EmaCrossStrategy(data=synthetic_bars(100_000), ticker='SYN', end_date=dt.date(2020, 1, 1),
+                                       days_nbr=0, interval='1m', amount=10_000)))
@@ -0,0 +1,93 @@
+'''
+Checkpoint and resume for long EventBased runs (EmaCrossStrategy / ArimaTickStrategy in-memory loops).
+A checkpoint directory holds:
+- state.pkl: engine and strategy state at the start of a bar, pickled and swapped in atomically (os.replace)
+- journal.bin: raw TradeJournal records, each save only appends the trades closed since the previous one
+'''
+
+from utils import *
+from journal import TradeJournal
+import os
+import pickle
+
+class Checkpoint () :
+    '''
+    Set strategy.checkpoint = Checkpoint(path, every) before run_backtest, the loop saves at every bar
+    multiple of every. resume(strategy, path) goes on from the last save.
+    Records of journal.bin past the saved journal size (a crash between the two writes) are dropped on restore.
+    '''
+
+    def __init__ (self, path: str, every: int = 1000) :
+        if every < 1 :
+            raise ValueError('every must be >= 1')
+        self.path = path
+        self.every = int(every)
+        self.saves = 0
+        self._written = 0  # journal records already in journal.bin
+        os.makedirs(path, exist_ok=True)
+
+    @property
+    def state_file (self) -> str :
+        return os.path.join(self.path, 'state.pkl')
+
+    @property
+    def journal_file (self) -> str :
+        return os.path.join(self.path, 'journal.bin')
+
+    def maybe_save (self, strategy, index: int) :
+        if index % self.every == 0 :
+            self.save(strategy, index)
+
+    def save (self, strategy, index: int) :
+        # State at the start of bar index: the resumed run starts its loop at index
+        journal = strategy.trade_performance
+        if len(journal) < self._written :
+            raise ValueError('Journal shorter than the checkpointed one, reset the strategy or use a new path')
+        with open(self.journal_file, 'ab' if self._written else 'wb') as f :
+            f.write(journal.records[self._written:].tobytes())
+        self._written = len(journal)
+        state = {'index': index, 'journal_size': len(journal), 'tz': journal.tz, 'strategy': strategy.checkpoint_state()}
+        tmp = self.state_file + '.tmp'
+        with open(tmp, 'wb') as f :
+            pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, self.state_file)
+        self.saves += 1
+
+    def load (self) -> dict :
+        # Last saved state, None when nothing was saved yet
+        if not os.path.exists(self.state_file) :
+            return None
+        with open(self.state_file, 'rb') as f :
+            return pickle.load(f)
+
+    def restore (self, strategy) -> int :
+        '''
+        Puts the last saved state and journal back into strategy, returns the bar to restart from
+        (None when there is no checkpoint yet).
+        '''
+        state = self.load()
+        if state is None :
+            return None
+        size = state['journal_size']
+        records = np.fromfile(self.journal_file, dtype=TradeJournal.dtype, count=size) if size else np.empty(0, TradeJournal.dtype)
+        if len(records) < size :
+            raise ValueError(f'{self.journal_file} holds {len(records)} trades, the checkpoint expects {size}')
+        with open(self.journal_file, 'r+b' if os.path.exists(self.journal_file) else 'wb') as f :
+            f.truncate(size * TradeJournal.dtype.itemsize)
+        strategy.restore_state(state['strategy'], TradeJournal.from_records(records, state['tz']))
+        self._written = size
+        return state['index']
+
+def resume (strategy, path: str, every: int = 1000, **run_kwargs) :
+    '''
+    Runs strategy.run_backtest(**run_kwargs) with checkpoints in path, starting from the last one if any.
+    The strategy must be built on the same data and parameters as the interrupted run, its journal is then
+    identical to the one of an uninterrupted run.
+    '''
+    strategy.checkpoint = Checkpoint(path, every)
+    start = strategy.checkpoint.restore(strategy)
+    if start is not None :
+        logger.info(f'[INFO] Resuming from bar {start} ({len(strategy.trade_performance)} trades)')
+        run_kwargs['start'] = max(start, run_kwargs.get('start', 0))
+    strategy.run_backtest(**run_kwargs)
+    return strategy
@@ -0,0 +1,24 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+def random_walk_bars (n, seed=0, freq='D', tz=None, flat=0, spread=0.005, volume=None) :
+    '''
+    Offline OHLCV bars shared by the tests: geometric random walk of the Close, Open close to it.
+    - flat: the first flat bars at a constant price (equal EMAs)
+    - spread: High / Low distance around max / min(Open, Close)
+    - volume: constant Volume, random between 1000 and 5000 otherwise
+    '''
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, n)))
+    close[:flat] = 100.0
+    open_ = close * np.exp(rng.normal(0, 0.003, n))
+    open_[:flat] = 100.0
+    volume = rng.integers(1000, 5000, n).astype(float) if volume is None else np.full(n, float(volume))
+    return pd.DataFrame({'Open': open_, 'High': np.maximum(open_, close) * (1 + spread),
+                         'Low': np.minimum(open_, close) * (1 - spread), 'Close': close, 'Volume': volume},
+                        index=pd.date_range('2020-01-01', periods=n, freq=freq, tz=tz))
+
+@pytest.fixture
+def bars () :
+    return random_walk_bars
@@ -0,0 +1,139 @@
+'''
+Market data providers and a persistent on-disk cache in front of them.
+- providers: YFinanceProvider (network) and FileProvider (local CSV/Parquet files)
+- DataCache: Parquet store per ticker/interval, fetches only the missing date ranges
+'''
+
+from utils import *
+import json
+import os
+
+OHLCV = ['Open', 'High', 'Low', 'Close', 'Volume']
+
+def _slice (df: pd.DataFrame, start, end) -> pd.DataFrame :
+    # [start, end) like yf.download, bounds follow the timezone of the index
+    start, end = pd.Timestamp(start), pd.Timestamp(end)
+    tz = getattr(df.index, 'tz', None)
+    if tz is not None:
+        start, end = start.tz_localize(tz), end.tz_localize(tz)
+    return df[(df.index >= start) & (df.index < end)]
+
+class YFinanceProvider () :
+
+    def fetch (self, ticker, start, end, interval) -> pd.DataFrame :
+        raw_df = yf.download(ticker, start = start, end = end, interval = interval, auto_adjust = True)
+        if isinstance(raw_df.columns, pd.MultiIndex) :
+            raw_df.columns = raw_df.columns.droplevel(1)
+        return raw_df[OHLCV]
+
+class FileProvider () :
+    '''
+    Reads bars from local files instead of the network, e.g. on offline nodes or in tests.
+    Looks for <root>/<ticker>_<interval>.parquet|.csv then <root>/<ticker>.parquet|.csv
+    '''
+
+    def __init__ (self, root: str) :
+        self.root = root
+
+    def fetch (self, ticker, start, end, interval) -> pd.DataFrame :
+        for name in (f'{ticker}_{interval}', ticker) :
+            path = os.path.join(self.root, name)
+            if os.path.exists(path + '.parquet') :
+                df = pd.read_parquet(path + '.parquet')
+                return _slice(df, start, end)[OHLCV]
+            if os.path.exists(path + '.csv') :
+                df = pd.read_csv(path + '.csv', index_col=0, parse_dates=True)
+                return _slice(df, start, end)[OHLCV]
+        raise ValueError(f'No local file for {ticker} ({interval}) in {self.root}')
+
+class DataCache () :
+    '''
+    Persistent cache keyed by ticker/interval, stored as Parquet with a JSON sidecar
+    listing the date ranges already fetched.
+    - get() only asks the provider for the parts of [start, end) not covered yet and merges them
+    - offline=True never calls the provider and fails if the range is not fully cached
+    '''
+
+    def __init__ (self, root: str = 'data_cache', provider=None, offline: bool = False) :
+        self.root = root
+        self.provider = provider if provider is not None else YFinanceProvider()
+        self.offline = offline
+        os.makedirs(self.root, exist_ok=True)
+
+    def _paths (self, ticker, interval) :
+        base = os.path.join(self.root, f'{ticker}_{interval}')
+        return base + '.parquet', base + '.json'
+
+    def _load (self, ticker, interval) :
+        data_path, meta_path = self._paths(ticker, interval)
+        if not os.path.exists(data_path) :
+            return None, []
+        with open(meta_path) as f :
+            ranges = [(pd.Timestamp(a), pd.Timestamp(b)) for a, b in json.load(f)['ranges']]
+        return pd.read_parquet(data_path), ranges
+
+    def _save (self, ticker, interval, df, ranges) :
+        data_path, meta_path = self._paths(ticker, interval)
+        df.to_parquet(data_path)
+        with open(meta_path, 'w') as f :
+            json.dump({'ranges': [(a.isoformat(), b.isoformat()) for a, b in ranges]}, f)
+
+    @staticmethod
+    def missing_ranges (ranges, start, end) -> list :
+        # Parts of [start, end) not covered by the sorted, non-overlapping ranges
+        missing, cursor = [], start
+        for a, b in ranges :
+            if b <= cursor or a >= end :
+                continue
+            if a > cursor :
+                missing.append((cursor, a))
+            cursor = max(cursor, b)
+        if cursor < end :
+            missing.append((cursor, end))
+        return missing
+
+    @staticmethod
+    def merge_ranges (ranges) -> list :
+        merged = []
+        for a, b in sorted(ranges) :
+            if merged and a <= merged[-1][1] :
+                merged[-1] = (merged[-1][0], max(merged[-1][1], b))
+            else :
+                merged.append((a, b))
+        return merged
+
+    def get (self, ticker, start, end, interval) -> pd.DataFrame :
+        start, end = pd.Timestamp(start), pd.Timestamp(end)
+        df, ranges = self._load(ticker, interval)
+        missing = self.missing_ranges(ranges, start, end)
+        if missing and self.offline :
+            gaps = ', '.join(f'{a.date()} -> {b.date()}' for a, b in missing)
+            raise ValueError(f'Offline mode : {ticker} ({interval}) not cached for {gaps}')
+
+        fetched, empty = [], []
+        for a, b in missing :
+            part = self.provider.fetch(ticker, a, b, interval)
+            if len(part) > 0 :
+                fetched.append(part)
+                ranges.append((a, b))
+            else :
+                empty.append((a, b))
+        if fetched :
+            df = pd.concat(([df] if df is not None else []) + fetched)
+            df = df[~df.index.duplicated(keep='last')].sort_index()
+        if df is not None and len(df) > 0 and empty :
+            # An empty answer ending before the last cached bar is a weekend / holiday gap and is covered,
+            # one past it (failed download, data not published yet) is asked again next time
+            last = df.index.max()
+            last = last.tz_localize(None) if last.tz is not None else last
+            covered = [(a, b) for a, b in empty if b <= last]
+            ranges.extend(covered)
+        else :
+            covered = []
+        if fetched or covered :
+            ranges = self.merge_ranges(ranges)
+            self._save(ticker, interval, df, ranges)
+
+        if df is None :
+            return pd.DataFrame(columns=OHLCV)
+        return _slice(df, start, end).copy()
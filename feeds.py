@@ -0,0 +1,24 @@
+'''
+Bar feeds for EventBased.run_stream / run_stream_async.
+Every feed yields (timestamp, bar) pairs, bar being a dict of Open/High/Low/Close/Volume.
+'''
+
+from utils import *
+from data_cache import OHLCV
+import asyncio
+
+def frame_feed (df: pd.DataFrame, columns: list = OHLCV) :
+    # Replays an in-memory DataFrame bar by bar
+    for row in df[columns].itertuples(name=None) :
+        yield row[0], dict(zip(columns, row[1:]))
+
+def csv_feed (path: str, chunksize: int = 100_000, columns: list = OHLCV) :
+    # Replays a CSV file (index in the first column) at full speed, reading chunksize rows at a time
+    for chunk in pd.read_csv(path, index_col=0, parse_dates=True, chunksize=chunksize) :
+        yield from frame_feed(chunk, columns)
+
+async def replay_feed (feed, delay: float = 0.0) :
+    # Async simulated live feed over any bar feed, waiting delay seconds between bars
+    for timestamp, bar in feed :
+        yield timestamp, bar
+        await asyncio.sleep(delay)
@@ -0,0 +1,56 @@
+'''
+Fill models used by EventBased at execution time (next bar Open by default).
+A fill model turns an order into a fill price, a number of units and a commission,
+so cash and PnL include trading costs during the run instead of being adjusted afterwards.
+'''
+
+from utils import *
+
+class FillModel () :
+    '''
+    Pluggable execution model, set with strategy.fill_model = FillModel(...) before the run.
+    - commission: fixed amount per order, commission_bps: basis points of the traded notional
+    - slippage_bps + spread_bps / 2: adverse move from the Open, bounded by the bar's High (buy) / Low (sell)
+    - participation: at most this fraction of the bar's Volume is filled, the rest of an entry
+      is cancelled (partial fill); exits are never capped so the position can always be flattened
+    Every method works on scalars and on index arrays, subclasses can override any of them.
+    '''
+
+    def __init__ (self, commission: float = 0.0, commission_bps: float = 0.0, slippage_bps: float = 0.0,
+                  spread_bps: float = 0.0, participation: float = None) :
+        self.commission = float(commission)
+        self.commission_bps = float(commission_bps)
+        self.slippage_bps = float(slippage_bps)
+        self.spread_bps = float(spread_bps)
+        self.participation = participation
+
+    def price (self, bars, i, side) :
+        # Fill price at bar i for a buy (side 1) or a sell (side -1)
+        open_ = bars.open[i]
+        shift = (self.slippage_bps + self.spread_bps / 2) * 1e-4
+        if shift == 0 :
+            return open_
+        if np.ndim(side) == 0 :
+            if side > 0 :
+                price = open_ * (1 + shift)
+                return np.minimum(price, bars['High'][i]) if 'High' in bars else price
+            price = open_ * (1 - shift)
+            return np.maximum(price, bars['Low'][i]) if 'Low' in bars else price
+        price = open_ * (1 + side * shift)
+        if 'High' in bars and 'Low' in bars :
+            price = np.where(side > 0, np.minimum(price, bars['High'][i]), np.maximum(price, bars['Low'][i]))
+        return price
+
+    def max_units (self, bars, i) :
+        # Volume participation limit at bar i, inf when there is none
+        if self.participation is None or 'Volume' not in bars :
+            return np.inf if np.ndim(i) == 0 else np.full(len(i), np.inf)
+        return np.floor(self.participation * bars['Volume'][i])
+
+    def units (self, bars, i, units: int) -> int :
+        # Units actually filled on an entry of units at bar i
+        return int(min(units, self.max_units(bars, i)))
+
+    def fees (self, units, price) :
+        # Commission of an order of units at price
+        return self.commission + self.commission_bps * 1e-4 * np.abs(units) * price
@@ -0,0 +1,102 @@
+'''
+Indicator registry and memoization cache shared by every strategy instance of a process.
+Results are keyed by (input fingerprint, indicator, params), so a sweep over many parameter
+sets computes each EMA span or rolling window once per data set.
+'''
+
+from utils import *
+from collections import OrderedDict
+import hashlib
+
+def _ema (values, span) :
+    return pd.Series(values).ewm(span=span, adjust=False).mean().to_numpy()
+
+def _sma (values, window) :
+    return pd.Series(values).rolling(window).mean().to_numpy()
+
+def _rolling_std (values, window, ddof=1) :
+    return pd.Series(values).rolling(window).std(ddof=ddof).to_numpy()
+
+def _rolling_min (values, window) :
+    return pd.Series(values).rolling(window).min().to_numpy()
+
+def _rolling_max (values, window) :
+    return pd.Series(values).rolling(window).max().to_numpy()
+
+def _log_ret (values) :
+    # Same as ArimaTickStrategy's log_ret column: log(Close).diff(), inf/NaN (first bar) set to 0
+    out = np.diff(np.log(values), prepend=np.nan)
+    out[~np.isfinite(out)] = 0.0
+    return out
+
+INDICATORS = {
+    'ema': _ema,
+    'sma': _sma,
+    'rolling_mean': _sma,
+    'rolling_std': _rolling_std,
+    'rolling_min': _rolling_min,
+    'rolling_max': _rolling_max,
+    'log_ret': _log_ret,
+}
+
+def register_indicator (name: str, fn) :
+    # fn(values, **params) -> array of len(values)
+    INDICATORS[name] = fn
+
+def fingerprint (values) -> str :
+    # Content hash of a 1-D array, computed once per series and passed to IndicatorCache.get(key=...)
+    values = np.ascontiguousarray(values)
+    digest = hashlib.blake2b(values.view(np.uint8), digest_size=16)
+    digest.update(f'{values.dtype.str}{values.shape}'.encode())
+    return digest.hexdigest()
+
+class IndicatorCache () :
+    '''
+    LRU cache of indicator arrays bounded by max_bytes.
+    - get() returns read-only arrays, callers needing to write must copy them
+    - hits / misses / evictions counters, see stats()
+    - an array larger than max_bytes is computed and returned but not kept
+    '''
+
+    def __init__ (self, max_bytes: int = 256 * 2**20) :
+        self.max_bytes = int(max_bytes)
+        self._entries = OrderedDict()
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get (self, name: str, values, key: str = None, **params) -> np.ndarray :
+        if name not in INDICATORS :
+            raise ValueError(f'Unknown indicator {name}, known : {sorted(INDICATORS)}')
+        values = np.asarray(values, dtype=float)
+        entry = (key if key is not None else fingerprint(values), name, tuple(sorted(params.items())))
+        result = self._entries.get(entry)
+        if result is not None :
+            self.hits += 1
+            self._entries.move_to_end(entry)
+            return result
+        self.misses += 1
+        result = np.asarray(INDICATORS[name](values, **params), dtype=float)
+        result.flags.writeable = False
+        if result.nbytes <= self.max_bytes :
+            self._entries[entry] = result
+            self.nbytes += result.nbytes
+            while self.nbytes > self.max_bytes :
+                _, old = self._entries.popitem(last=False)
+                self.nbytes -= old.nbytes
+                self.evictions += 1
+        return result
+
+    def clear (self) :
+        self._entries.clear()
+        self.nbytes = 0
+
+    def stats (self) -> dict :
+        lookups = self.hits + self.misses
+        return {'hits': self.hits, 'misses': self.misses, 'evictions': self.evictions,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'entries': len(self._entries), 'nbytes': self.nbytes}
+
+# Process-wide cache used by the strategies, e.g. indicator_cache.max_bytes = 2**30 for long intraday series
+indicator_cache = IndicatorCache()
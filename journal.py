@@ -0,0 +1,129 @@
+'''
+Columnar trade journal used by EventBased and consumed by TradeAnalysis.
+'''
+
+from utils import *
+
+def _ns (date) -> int :
+    # int64 nanoseconds of a date, skips the Timestamp construction for pd.Timestamp and int64 ns input
+    if isinstance(date, pd.Timestamp) :
+        return date.value
+    if isinstance(date, (int, np.integer)) :
+        return int(date)
+    return pd.Timestamp(date).value
+
+class TradeJournal () :
+    '''
+    Append-only trade journal stored in a preallocated NumPy record array (capacity doubled when full).
+    - one record per closed trade, two closes on the same date are both kept
+    - dates stored as int64 nanoseconds, timezone of the first date kept in self.tz
+    - to_frame() gives the DataFrame layout TradeAnalysis works on (indexed by exit date)
+    '''
+
+    dtype = np.dtype([
+        ('entry_date', 'i8'),
+        ('exit_date', 'i8'),
+        ('side', 'i1'),  # 1 long, -1 short
+        ('units', 'i8'),
+        ('entry_price', 'f8'),
+        ('exit_price', 'f8'),
+        ('log_return', 'f8'),
+        ('pnl', 'f8'),
+        ('capital', 'f8'),
+        ('fees', 'f8'),  # entry + exit commissions, already taken out of pnl
+    ])
+
+    def __init__ (self, capacity: int = 1024) :
+        self._records = np.empty(max(int(capacity), 1), dtype=self.dtype)
+        self._size = 0
+        self.tz = None
+
+    def __len__ (self) :
+        return self._size
+
+    @property
+    def records (self) -> np.ndarray :
+        return self._records[:self._size]
+
+    def _reserve (self, extra: int) :
+        needed = self._size + extra
+        if needed > len(self._records) :
+            grown = np.empty(max(needed, 2 * len(self._records)), dtype=self.dtype)
+            grown[:self._size] = self._records[:self._size]
+            self._records = grown
+
+    def _set_tz (self, date) :
+        if self._size == 0 :
+            self.tz = getattr(date, 'tz', None)
+
+    def append (self, entry_date, exit_date, side: int, units: int, entry_price: float, exit_price: float,
+                log_return: float, pnl: float, capital: float, fees: float = 0.0) :
+        self._set_tz(exit_date)
+        self._reserve(1)
+        self._records[self._size] = (_ns(entry_date), _ns(exit_date), side, units,
+                                     entry_price, exit_price, log_return, pnl, capital, fees)
+        self._size += 1
+
+    def extend (self, entry_dates: pd.DatetimeIndex, exit_dates: pd.DatetimeIndex, sides, units,
+                entry_prices, exit_prices, log_returns, pnls, capital, fees=0.0) :
+        # Bulk append from arrays, used by EventBased.run_vectorized
+        n = len(exit_dates)
+        if n == 0 :
+            return
+        self._set_tz(exit_dates)
+        self._reserve(n)
+        block = self._records[self._size:self._size + n]
+        block['entry_date'] = pd.DatetimeIndex(entry_dates).asi8
+        block['exit_date'] = pd.DatetimeIndex(exit_dates).asi8
+        block['side'] = sides
+        block['units'] = units
+        block['entry_price'] = entry_prices
+        block['exit_price'] = exit_prices
+        block['log_return'] = log_returns
+        block['pnl'] = pnls
+        block['capital'] = capital
+        block['fees'] = fees
+        self._size += n
+
+    @classmethod
+    def concat (cls, journals: list) :
+        # One journal with the records of journals in the given order, e.g. stitched walk-forward test windows
+        out = cls(sum(len(journal) for journal in journals))
+        for journal in journals :
+            if len(journal) == 0 :
+                continue
+            if out._size == 0 :
+                out.tz = journal.tz
+            out._reserve(len(journal))
+            out._records[out._size:out._size + len(journal)] = journal.records
+            out._size += len(journal)
+        return out
+
+    @classmethod
+    def from_records (cls, records: np.ndarray, tz=None) :
+        # Journal over a copy of raw records (e.g. read back from a checkpoint file)
+        out = cls(len(records))
+        out._records[:len(records)] = records
+        out._size = len(records)
+        out.tz = tz
+        return out
+
+    def dates (self, field: str = 'exit_date') -> pd.DatetimeIndex :
+        index = pd.DatetimeIndex(self.records[field].view('M8[ns]'))
+        return index.tz_localize('UTC').tz_convert(self.tz) if self.tz is not None else index
+
+    def to_frame (self) -> pd.DataFrame :
+        rec = self.records
+        return pd.DataFrame({
+            'Type of trade': np.where(rec['side'] == 1, 'long', 'short').astype(object),
+            'Number of shares': rec['units'],
+            'Duration': pd.to_timedelta(rec['exit_date'] - rec['entry_date'], unit='ns'),
+            'Performance [%]': rec['log_return'] * 100,
+            'Log Return': rec['log_return'],
+            'PnL': rec['pnl'],
+            'Capital After Trade': rec['capital'],
+            'Entry Date': self.dates('entry_date'),
+            'Entry Price': rec['entry_price'],
+            'Exit Price': rec['exit_price'],
+            'Fees': rec['fees'],
+        }, index=self.dates('exit_date'))
@@ -9,6 +9,7 @@ end_date = dt.date.today()
 days_nbr = 365 * 2
 interval = '1d'
 initial_capital = 10000
+enable_logging()  # print every order, silent by default
 
 # === Run and backtest ===
 strategy = EmaCrossStrategy(
@@ -45,7 +46,8 @@ ta = TradeAnalysis(
     price_series=strategy.data['Close'],
     capital=initial_capital,
     cost_per_trade=0,
-    slippage=0
+    slippage=0,
+    equity_curve=strategy.equity_curve()['equity']
 )
 
 ta_arima = TradeAnalysis(
@@ -53,7 +55,8 @@ ta_arima = TradeAnalysis(
     capital=initial_capital,
     cost_per_trade=0,
     slippage=0,
-    price_series=strategy.data['Close'])
+    price_series=strategy.data['Close'],
+    equity_curve=strategy_arima.equity_curve()['equity'])
 
 
 print('\n=== EMA Strategy Analysis and Visualisation ===')
@@ -0,0 +1,231 @@
+'''
+Bootstrap / Monte Carlo robustness checks for TradeAnalysis.
+Resampled paths are built as one 2-D NumPy matrix per chunk (paths x trades) and every
+report() metric is computed row-wise, so tens of thousands of paths take seconds.
+'''
+
+from utils import *
+from tradeanalysis import *
+from parallel import run_tasks, worker_state
+
+METHODS = ('trades', 'permutation', 'block')
+
+def _block_indices (rng, rows: int, n: int, block_size: int) -> np.ndarray :
+    # Moving-block bootstrap: each row is made of runs of block_size consecutive positions
+    n_blocks = -(-n // block_size)
+    starts = rng.integers(0, max(n - block_size + 1, 1), size=(rows, n_blocks))
+    idx = (starts[:, :, None] + np.arange(block_size)).reshape(rows, -1)[:, :n]
+    return np.minimum(idx, n - 1)
+
+def _resample (rng, rows: int, n: int, method: str, block_size: int) -> np.ndarray :
+    if method == 'trades':
+        return rng.integers(0, n, size=(rows, n))
+    if method == 'permutation':
+        return rng.permuted(np.tile(np.arange(n), (rows, 1)), axis=1)
+    return _block_indices(rng, rows, n, block_size)
+
+def _draw (rng, rows: int, value) -> np.ndarray :
+    # Fixed value, or (low, high) drawn uniformly once per path
+    if np.ndim(value) == 0:
+        return np.full((rows, 1), float(value))
+    low, high = value
+    return rng.uniform(low, high, size=(rows, 1))
+
+def _row_std (values, mask=None) :
+    # Row-wise mean and sample std (ddof=1) of the values where mask, NaN below two values like batch_metrics
+    if mask is None:
+        count = values.shape[1]
+        mean = values.mean(axis=1)
+        std = values.std(axis=1, ddof=1) if count > 1 else np.full(len(values), np.nan)
+        return mean, std
+    count = mask.sum(axis=1)
+    mean = np.where(mask, values, 0.0).sum(axis=1) / count
+    dev = values - mean[:, None]
+    dev *= mask
+    sq = np.einsum('ij,ij->i', dev, dev)
+    return mean, np.where(count > 1, np.sqrt(sq / np.maximum(count - 1, 1)), np.nan)
+
+def _drawdown_rows (equity) -> np.ndarray :
+    drawdown = np.maximum(equity / np.maximum.accumulate(equity, axis=1) - 1, -1.0)
+    return np.nanmin(drawdown, axis=1)
+
+def trade_path_metrics (inputs: dict, idx: np.ndarray, slippage, cost, capital: float, risk_free: float) -> dict :
+    '''
+    report() statistics of every row of idx (trade positions), same formulas as TradeAnalysis.batch_metrics.
+    - slippage (fraction of the entry notional) and cost (per trade) are (rows, 1) arrays
+    - equity is rebuilt as capital + cumulative PnL, recovery is not computed (paths have no dates)
+    '''
+    pnl = inputs['pnl'][idx]
+    perf = inputs['perf'][idx]
+    adjust = slippage + cost / capital
+    if np.any(adjust != 0):
+        pnl = pnl - slippage * inputs['notional'][idx] - cost
+        perf = 100 * np.log1p(np.maximum(np.expm1(perf / 100) - adjust, -1 + 1e-12))
+    long_ = inputs['long'][idx]
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        excess = pnl / capital - risk_free / 252
+        excess_mean, excess_std = _row_std(excess)
+        sharpe = np.where(excess_std != 0, np.sqrt(252) * excess_mean / excess_std, 0.0)
+        _, down_std = _row_std(excess, excess < 0)
+        sortino = np.where(down_std != 0, np.sqrt(252) * excess_mean / down_std, 0.0)
+
+        win = pnl > 0
+        count = pnl.shape[1]
+        nbr_win = win.sum(axis=1)
+        nbr_loss = count - nbr_win
+        win_rate = nbr_win / count
+        avg_win = np.where(nbr_win > 0, np.maximum(pnl, 0.0).sum(axis=1) / nbr_win, 0.0)
+        avg_loss = np.where(nbr_loss > 0, np.abs(np.minimum(pnl, 0.0).sum(axis=1) / nbr_loss), 1.0)
+        gain_loss_ratio = np.where(avg_loss != 0, avg_win / avg_loss, 0.0)
+        kelly = win_rate - (1 - win_rate) / (avg_win / avg_loss)
+        kelly = np.where((nbr_win > 0) & (nbr_loss > 0), np.maximum(kelly, 0.0), 0.0)
+        max_dd = _drawdown_rows(capital + np.cumsum(pnl, axis=1))
+
+    return {
+        'nbr_long': long_.sum(axis=1),
+        'nbr_short': count - long_.sum(axis=1),
+        'total_trade': np.full(len(idx), count),
+        'avg_period_trade': pd.to_timedelta(inputs['duration'][idx].mean(axis=1), unit='ns'),
+        'avg_profit': perf.mean(axis=1),
+        'avg_net_profit': pnl.mean(axis=1),
+        'pnl': pnl.sum(axis=1),
+        'sharpe': sharpe,
+        'sortino': sortino,
+        'max_drawdown': max_dd,
+        'win_rate': win_rate,
+        'gain_loss_ratio': gain_loss_ratio,
+        'kelly': kelly
+    }
+
+def bar_path_metrics (returns: np.ndarray, risk_free: float, periods_per_year: int) -> dict :
+    # Row-wise TradeAnalysis.equity_metrics on (rows, bars) simple returns of the equity curve
+    with np.errstate(divide='ignore', invalid='ignore'):
+        excess = returns - risk_free / periods_per_year
+        mean, std = _row_std(excess)
+        _, down_std = _row_std(excess, excess < 0)
+        equity = np.cumprod(np.concatenate([np.ones((len(returns), 1)), 1 + returns], axis=1), axis=1)
+        return {
+            'bar_sharpe': np.where(std != 0, np.sqrt(periods_per_year) * mean / std, 0.0),
+            'bar_sortino': np.where(down_std != 0, np.sqrt(periods_per_year) * mean / down_std, 0.0),
+            'bar_max_drawdown': _drawdown_rows(equity)
+        }
+
+def _run_chunk (task) :
+    seed, rows = task
+    state = worker_state()
+    inputs, settings = state['inputs'], state['settings']
+    rng = np.random.default_rng(seed)
+    n = len(inputs['pnl'])
+    idx = _resample(rng, rows, n, settings['method'], settings['block_size'])
+    slippage = _draw(rng, rows, settings['slippage'])
+    cost = _draw(rng, rows, settings['cost_per_trade'])
+    out = trade_path_metrics(inputs, idx, slippage, cost, settings['capital'], settings['risk_free'])
+    if inputs.get('bar_returns') is not None:
+        returns = inputs['bar_returns']
+        bar_idx = _block_indices(rng, rows, len(returns), settings['block_size'])
+        out.update(bar_path_metrics(returns[bar_idx], settings['risk_free'], settings['periods_per_year']))
+    return pd.DataFrame(out)
+
+class MonteCarlo () :
+    '''
+    Distributions of the TradeAnalysis metrics over resampled trade sequences.
+    - method: 'trades' (bootstrap of trades with replacement), 'permutation' (same trades, random order,
+      only path metrics like drawdown change) or 'block' (moving-block bootstrap of block_size trades)
+    - slippage / cost_per_trade: fixed value or (low, high) range drawn per path, applied to each trade
+      (slippage as a fraction of the entry notional, cost in currency)
+    - with an equity curve on the analysis, its bar returns are block-bootstrapped for the bar_* metrics
+    - paths are simulated max_bytes at a time, on a process pool when processes > 1; for a given
+      seed and max_bytes the paths do not depend on processes
+    '''
+
+    def __init__ (self, analysis: TradeAnalysis, n_paths: int = 10_000, method: str = 'trades', block_size: int = 10,
+                  slippage=0.0, cost_per_trade=0.0, risk_free: float = 0.02, seed: int = None,
+                  max_bytes: int = 64 * 2**20, processes: int = 1) :
+        if method not in METHODS:
+            raise ValueError(f'method must be one of {METHODS}')
+        self.analysis = analysis
+        self.n_paths = int(n_paths)
+        self.method = method
+        self.block_size = max(int(block_size), 1)
+        self.slippage = slippage
+        self.cost_per_trade = cost_per_trade
+        self.risk_free = risk_free
+        self.seed = seed
+        self.max_bytes = max_bytes
+        self.processes = processes
+        self.paths = None
+        self.inputs = self._inputs()
+
+    def _inputs (self) -> dict :
+        journal = self.analysis.journal
+        arrays = TradeAnalysis._journal_arrays(journal)
+        if len(arrays['pnl']) == 0:
+            raise ValueError('No trades to resample')
+        if isinstance(journal, TradeJournal):
+            notional = journal.records['units'] * journal.records['entry_price']
+        elif {'Number of shares', 'Entry Price'}.issubset(journal.columns):
+            notional = (journal['Number of shares'] * journal['Entry Price']).to_numpy(dtype=float)
+        else:
+            notional = np.full(len(arrays['pnl']), float(self.analysis.capital))
+        inputs = {'long': arrays['long'], 'duration': arrays['duration'].astype(float), 'perf': arrays['perf'],
+                  'pnl': arrays['pnl'], 'notional': notional, 'bar_returns': None}
+        if self.analysis.equity_curve is not None:
+            equity = np.asarray(self.analysis.equity_curve, dtype=float)
+            if len(equity) > 2:
+                with np.errstate(divide='ignore', invalid='ignore'):
+                    inputs['bar_returns'] = equity[1:] / equity[:-1] - 1
+        return inputs
+
+    def _tasks (self) -> list :
+        width = len(self.inputs['pnl'])
+        if self.inputs['bar_returns'] is not None:
+            width = max(width, len(self.inputs['bar_returns']) + 1)
+        # ~6 temporaries of rows x width float64 alive at once
+        rows = max(1, int(self.max_bytes // (48 * width)))
+        sizes = [min(rows, self.n_paths - start) for start in range(0, self.n_paths, rows)]
+        seeds = np.random.SeedSequence(self.seed).spawn(len(sizes))
+        return list(zip(seeds, sizes))
+
+    def run (self) -> pd.DataFrame :
+        # One row of metrics per simulated path, also kept in self.paths
+        settings = {
+            'method': self.method,
+            'block_size': self.block_size,
+            'slippage': self.slippage,
+            'cost_per_trade': self.cost_per_trade,
+            'capital': float(self.analysis.capital),
+            'risk_free': self.risk_free,
+            'periods_per_year': self.analysis.periods_per_year
+        }
+        state = {'inputs': self.inputs, 'settings': settings}
+        chunks = list(run_tasks(_run_chunk, self._tasks(), state, self.processes, ordered=True))
+        self.paths = pd.concat(chunks, ignore_index=True)
+        return self.paths
+
+    def observed (self) -> pd.Series :
+        # Metrics of the original trade order without costs (pnl / drawdown from capital + cumulative PnL)
+        n = len(self.inputs['pnl'])
+        zero = np.zeros((1, 1))
+        out = trade_path_metrics(self.inputs, np.arange(n)[None, :], zero, zero, float(self.analysis.capital), self.risk_free)
+        if self.inputs['bar_returns'] is not None:
+            out.update(bar_path_metrics(self.inputs['bar_returns'][None, :], self.risk_free, self.analysis.periods_per_year))
+        return pd.DataFrame(out).iloc[0]
+
+    def confidence_intervals (self, level: float = 0.95) -> pd.DataFrame :
+        # Observed value, mean and two-sided level interval of every metric over the paths
+        if self.paths is None:
+            self.run()
+        tail = (1 - level) / 2
+        paths = self.paths
+        return pd.DataFrame({
+            'observed': self.observed(),
+            'mean': paths.mean(),
+            'lower': paths.quantile(tail),
+            'upper': paths.quantile(1 - tail)
+        })
+
+    def report (self, level: float = 0.95) :
+        ci = self.confidence_intervals(level)
+        print(f'=== Monte Carlo ({self.n_paths} paths, {self.method}, {level:.0%} interval) ===')
+        print(ci)
@@ -0,0 +1,78 @@
+'''
+Pending orders (limit, stop, stop-loss, take-profit) for EventBased, checked against each bar's High/Low.
+'''
+
+from utils import *
+import bisect
+
+ENTRY_KINDS = ('limit', 'stop')
+EXIT_KINDS = ('stop_loss', 'take_profit')
+
+class OrderBook () :
+    '''
+    Resting orders kept in two price-sorted lists of (price, order id) keys:
+    - low book: orders triggered when the bar Low reaches down to them (buy limit, sell stop,
+      long stop-loss, short take-profit), all keys with price >= Low
+    - high book: orders triggered when the bar High reaches up to them (buy stop, sell limit,
+      long take-profit, short stop-loss), all keys with price <= High
+    Finding the triggered orders is a bisect per book, O(log n) plus the orders returned.
+    '''
+
+    def __init__ (self) :
+        self.orders = {}
+        self._low = []
+        self._high = []
+        self._last_id = 0  # plain int, the book pickles into checkpoints
+
+    def __len__ (self) :
+        return len(self.orders)
+
+    @staticmethod
+    def _limit_like (kind) -> bool :
+        # Orders filled at their price or better: limits and take-profits
+        return kind in ('limit', 'take_profit')
+
+    def _book (self, order) -> list :
+        # A buy limit waits below the market (low book), a buy stop above it (high book), sells the other way round
+        below = (order['side'] == 1) == self._limit_like(order['kind'])
+        return self._low if below else self._high
+
+    def add (self, kind: str, side: int, price: float, units: int = None, stop_loss: float = None,
+             take_profit: float = None) -> int :
+        if kind not in ENTRY_KINDS + EXIT_KINDS :
+            raise ValueError(f'Unknown order kind {kind}, known : {ENTRY_KINDS + EXIT_KINDS}')
+        if side not in (1, -1) :
+            raise ValueError('side must be 1 (buy) or -1 (sell)')
+        self._last_id += 1
+        order_id = self._last_id
+        order = {'id': order_id, 'kind': kind, 'side': side, 'price': float(price), 'units': units,
+                 'stop_loss': stop_loss, 'take_profit': take_profit}
+        self.orders[order_id] = order
+        bisect.insort(self._book(order), (order['price'], order_id))
+        return order_id
+
+    def cancel (self, order_id: int) :
+        order = self.orders.pop(order_id, None)
+        if order is None :
+            return
+        book = self._book(order)
+        key = (order['price'], order_id)
+        del book[bisect.bisect_left(book, key)]
+
+    def cancel_exits (self) :
+        for order_id in [k for k, order in self.orders.items() if order['kind'] in EXIT_KINDS] :
+            self.cancel(order_id)
+
+    def triggered (self, low: float, high: float) -> list :
+        # Orders whose price the bar traded through, stop-losses first (worst case when both exits trigger),
+        # then take-profits, then entries in placement order
+        keys = self._low[bisect.bisect_left(self._low, (low, 0)):] + self._high[:bisect.bisect_right(self._high, (high, np.inf))]
+        rank = {'stop_loss': 0, 'take_profit': 1}
+        orders = [self.orders[order_id] for _, order_id in keys]
+        return sorted(orders, key=lambda order: (rank.get(order['kind'], 2), order['id']))
+
+    def fill_price (self, order, open_: float) -> float :
+        # Limit-like orders fill at their price or the better Open on a gap, stops at their price or the worse Open
+        if self._limit_like(order['kind']) :
+            return min(open_, order['price']) if order['side'] == 1 else max(open_, order['price'])
+        return max(open_, order['price']) if order['side'] == 1 else min(open_, order['price'])
@@ -0,0 +1,62 @@
+'''
+Process pool runner shared by the parameter sweeps, the walk-forward optimisation and the Monte Carlo.
+Read-only inputs (market data, trade arrays, settings) reach each worker process once through the pool
+initializer, tasks only carry their own parameters.
+'''
+
+from utils import *
+import multiprocessing as mp
+import os
+
+_WORKER = {}
+
+def _init_worker (state: dict) :
+    # Runs once per process, the state is shared by every task of the worker
+    _WORKER.clear()
+    _WORKER.update(state)
+
+def worker_state () -> dict :
+    # The state given to run_tasks, as seen from inside a task
+    return _WORKER
+
+def run_tasks (fn, tasks: list, state: dict, processes: int = None, chunksize: int = None, ordered: bool = False) :
+    '''
+    Yields fn(task) for every task, fn reads the shared inputs with worker_state().
+    - processes: pool size (default all cores), 1 runs in-process
+    - chunksize: tasks per dispatch, default about 4 dispatches per process
+    - ordered: results in task order, otherwise as they complete
+    '''
+    tasks = list(tasks)
+    processes = processes or os.cpu_count() or 1
+    if processes == 1 or len(tasks) <= 1 :
+        _init_worker(state)
+        for task in tasks :
+            yield fn(task)
+        return
+    if chunksize is None :
+        chunksize = max(1, len(tasks) // (processes * 4))
+    with mp.Pool(min(processes, len(tasks)), initializer=_init_worker, initargs=(state,)) as pool :
+        yield from (pool.imap if ordered else pool.imap_unordered)(fn, tasks, chunksize=chunksize)
+
+def market_state (market) -> dict :
+    # What the workers need to rebuild a strategy on the same data without downloading it again
+    return {
+        'ticker': market.ticker,
+        'end_date': market.end_date,
+        'days_nbr': market.days_nbr,
+        'interval': market.interval,
+        'data': market.data[['Open', 'High', 'Low', 'Close', 'Volume', 'log_returns']]
+    }
+
+def build_strategy (strategy_cls, market: dict, amount: float, fixed: dict, params: dict) :
+    # One strategy on the data of market_state(), fixed and params being constructor arguments
+    return strategy_cls(
+        ticker=market['ticker'],
+        end_date=market['end_date'],
+        days_nbr=market['days_nbr'],
+        interval=market['interval'],
+        amount=amount,
+        data=market['data'],
+        **fixed,
+        **params
+    )
@@ -0,0 +1,137 @@
+'''
+Multi-asset portfolio engine: many symbols, one cash balance, one time-ordered event loop.
+'''
+
+from utils import *
+from journal import *
+from backtest_engine import BarArrays
+import heapq
+
+class Portfolio () :
+    '''
+    Event-driven backtest over a basket of symbols with misaligned timestamps.
+    - per-symbol bar feeds (see feeds.py) are merged through a heap ordered by timestamp,
+      so the cost grows with the total number of bars, not symbols x bars
+    - each symbol has its own signal object (EmaCrossSignal, ArimaSignal, ...) whose
+      on_bar(timestamp, bar) returns a target position: 1 long, -1 short, 0 flat, None keep
+    - a target decided on a symbol's bar t is filled at the Open of that symbol's bar t+1
+    - one shared cash balance, positions held in per-symbol arrays, one TradeJournal per symbol
+    - fill_model (fills.py) prices fills, caps entries and charges fees like in EventBased
+    Not an EventBased subclass: EventBased is one account holding one position whose close only credits
+    the PnL, while the basket books every cash flow both ways against one shared balance. Pending orders
+    and checkpoints are not supported here.
+    Each journal's capital is the symbol's sleeve (allocation + its cumulative net PnL), so
+    TradeAnalysis.batch_metrics(list(journals.values()), portfolio.allocation) scores every symbol on
+    its own; the basket itself is cash + positions, see wealth().
+    '''
+    # Optional FillModel, None fills whole orders at the Open
+    fill_model = None
+
+    def __init__ (self, feeds: dict, signals: dict, amount: float, position_fraction: float = None,
+                  allow_negative_balance: bool = True) :
+        self.symbols = list(feeds)
+        self.feeds = feeds
+        self.signals = signals
+        self.initial_balance = amount
+        self.cash = amount
+        # Fraction of the current cash deployed per entry, default splits it across the basket
+        self.position_fraction = position_fraction if position_fraction is not None else 1.0 / max(len(self.symbols), 1)
+        self.allow_negative_balance = allow_negative_balance
+
+        n = len(self.symbols)
+        self.side = np.zeros(n, dtype=np.int8)
+        self.units = np.zeros(n, dtype=np.int64)
+        self.entry_price = np.zeros(n)
+        self.entry_date = [None] * n
+        self.last_close = np.full(n, np.nan)
+        self.pending = [None] * n  # target to fill at the symbol's next Open
+        self.entry_fees = np.zeros(n)
+        # Capital of a symbol's journal: equal share of the initial amount plus the symbol's realized PnL
+        self.allocation = amount / max(n, 1)
+        self.realized = np.zeros(n)
+        self.journals = {symbol: TradeJournal() for symbol in self.symbols}
+        self.events = 0
+
+    def wealth (self) -> float :
+        # Cash plus open positions marked at each symbol's last Close
+        held = self.side != 0
+        return self.cash + float(np.sum(self.side[held] * self.units[held] * self.last_close[held]))
+
+    def _fill_price (self, side, date, bar) :
+        # Fill price of a buy (1) / sell (-1) at the Open of bar, through the fill model when one is set
+        if self.fill_model is None :
+            return bar['Open'], None
+        bars = BarArrays.from_arrays([date], {col: np.array([value]) for col, value in bar.items()})
+        return float(self.fill_model.price(bars, 0, side)), bars
+
+    def _enter (self, k, side, date, bar) :
+        price, bars = self._fill_price(side, date, bar)
+        if not self.allow_negative_balance and self.cash < price :
+            if logger.isEnabledFor(logging.INFO) :
+                logger.info(f'[{date}] {self.symbols[k]} : Not enought capital to enter')
+            return
+        units = max(int(abs(self.cash * self.position_fraction) / price), 1)
+        fees = 0.0
+        if self.fill_model is not None :
+            units = self.fill_model.units(bars, 0, units)
+            if units <= 0 :
+                if logger.isEnabledFor(logging.INFO) :
+                    logger.info(f'[{date}] {self.symbols[k]} : No volume to enter')
+                return
+            fees = self.fill_model.fees(units, price)
+        self.cash -= side * units * price + fees
+        self.side[k], self.units[k], self.entry_price[k], self.entry_date[k] = side, units, price, date
+        self.entry_fees[k] = fees
+        if logger.isEnabledFor(logging.INFO) :
+            logger.info(f'Date : {date} | {self.symbols[k]} ORDER = {"Long" if side == 1 else "Short"} : {units} shares at {price}')
+
+    def _close (self, k, date, bar) :
+        side, units, entry_price = int(self.side[k]), int(self.units[k]), self.entry_price[k]
+        price, bars = self._fill_price(-side, date, bar)
+        fees = self.fill_model.fees(units, price) if self.fill_model is not None else 0.0
+        self.cash += side * units * price - fees
+        pnl = units * (price - entry_price) if side == 1 else units * (entry_price - price)
+        pnl -= self.entry_fees[k] + fees
+        log_return = np.log(price / entry_price) if side == 1 else np.log(entry_price / price)
+        self.side[k], self.units[k] = 0, 0
+        self.realized[k] += pnl
+        self.journals[self.symbols[k]].append(self.entry_date[k], date, side, units, entry_price, price,
+                                              log_return, pnl, self.allocation + self.realized[k],
+                                              self.entry_fees[k] + fees)
+        self.entry_fees[k] = 0.0
+        if logger.isEnabledFor(logging.INFO) :
+            logger.info(f'Date : {date} | {self.symbols[k]} Close Position : {units} shares at {price} | PnL : {pnl:.2f}')
+
+    def _fill (self, k, target, date, bar) :
+        if target is None or target == self.side[k] :
+            return
+        if self.side[k] != 0 :
+            self._close(k, date, bar)
+        if target != 0 :
+            self._enter(k, int(target), date, bar)
+
+    def run (self) :
+        iterators = [iter(self.feeds[symbol]) for symbol in self.symbols]
+        heap = []
+        for k, it in enumerate(iterators) :
+            first = next(it, None)
+            if first is not None :
+                heap.append((first[0], k, first[1]))
+        heapq.heapify(heap)
+
+        while heap :
+            timestamp, k, bar = heap[0]
+            self.events += 1
+            # Fill the order decided on this symbol's previous bar, then decide on this bar
+            self._fill(k, self.pending[k], timestamp, bar)
+            self.last_close[k] = bar['Close']
+            self.pending[k] = self.signals[self.symbols[k]].on_bar(timestamp, bar)
+            following = next(iterators[k], None)
+            if following is not None :
+                heapq.heapreplace(heap, (following[0], k, following[1]))
+            else :
+                heapq.heappop(heap)
+                # Last bar of the symbol: close what is left at its Open, like the single-asset loop
+                if self.side[k] != 0 :
+                    self._close(k, timestamp, bar)
+        return self.journals
@@ -0,0 +1,64 @@
+'''
+Opt-in profiling hooks for EventBased strategies.
+A Profiler wraps methods of one strategy instance (instance attributes shadowing the class methods),
+so a strategy without a profiler attached runs the plain methods at no extra cost.
+'''
+
+from utils import *
+from collections import defaultdict
+import time
+
+# Per-bar callbacks, timed on every call
+TIMED_CALLS = ('_on_signal', 'on_bar', '_maybe_refit', 'process_orders')
+# Orders, model fits and per-order output, counted (and timed) on every call
+COUNTED_CALLS = ('enter_long', 'enter_short', 'close_position', '_fit_model', '_update_model',
+                 '_log_order', 'print_balance', 'print_wealth')
+
+class Profiler () :
+    '''
+    Call counters and cumulated time per hooked method.
+    - attach(strategy) before the run, detach(strategy) to remove the hooks
+    - stats() gives calls, total seconds and mean microseconds per call
+    '''
+
+    def __init__ (self) :
+        self.calls = defaultdict(int)
+        self.seconds = defaultdict(float)
+        self._attached = {}
+
+    def _wrap (self, name, method) :
+        calls, seconds = self.calls, self.seconds
+        clock = time.perf_counter
+
+        def hooked (*args, **kwargs) :
+            t0 = clock()
+            try :
+                return method(*args, **kwargs)
+            finally :
+                seconds[name] += clock() - t0
+                calls[name] += 1
+        return hooked
+
+    def attach (self, strategy, names: tuple = TIMED_CALLS + COUNTED_CALLS) :
+        hooked = []
+        for name in names :
+            method = getattr(strategy, name, None)
+            if method is not None and name not in strategy.__dict__ :
+                setattr(strategy, name, self._wrap(name, method))
+                hooked.append(name)
+        self._attached[id(strategy)] = hooked
+        return strategy
+
+    def detach (self, strategy) :
+        for name in self._attached.pop(id(strategy), []) :
+            delattr(strategy, name)
+
+    def reset (self) :
+        self.calls.clear()
+        self.seconds.clear()
+
+    def stats (self) -> pd.DataFrame :
+        rows = [{'method': name, 'calls': self.calls[name], 'total_s': self.seconds[name],
+                 'mean_us': self.seconds[name] / self.calls[name] * 1e6} for name in self.calls if self.calls[name]]
+        columns = ['method', 'calls', 'total_s', 'mean_us']
+        return pd.DataFrame(rows, columns=columns).set_index('method').sort_values('total_s', ascending=False)
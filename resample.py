@@ -0,0 +1,195 @@
+'''
+OHLCV aggregation of fine bars into coarser ones (e.g. 1m -> 5m, 1h, 1d) with yfinance-style intervals.
+- resample_bars: one vectorized pass over a whole DataFrame (np.*.reduceat per column)
+- BarAggregator: the same bars built incrementally, bar by bar (streams) or chunk by chunk (TickStore)
+- timeframe_context: values of completed coarse bars aligned on the fine bars, without look-ahead
+Minute and hour buckets are cut on the UTC clock, day / week / month buckets on the local calendar.
+'''
+
+from utils import *
+import re
+
+AGGREGATIONS = {'Open': 'first', 'High': 'max', 'Low': 'min', 'Close': 'last', 'Volume': 'sum'}
+_SECONDS = {'m': 60, 'h': 3600, 'd': 86400, 'wk': 7 * 86400}
+_MONDAY = 4 * 86400 * 10**9  # 1970-01-01 is a Thursday, weekly buckets start on Mondays
+
+def parse_interval (interval: str) -> tuple :
+    # '5m' -> (5, 'm'), units m, h, d, wk, mo
+    match = re.fullmatch(r'(\d+)(m|h|d|wk|mo)', interval)
+    if match is None or int(match.group(1)) < 1 :
+        raise ValueError(f'Unknown interval {interval}, expected e.g. 1m, 5m, 1h, 1d, 1wk, 1mo')
+    return int(match.group(1)), match.group(2)
+
+def _calendar (unit: str) -> bool :
+    return unit in ('d', 'wk', 'mo')
+
+def _clock (index: pd.DatetimeIndex, unit: str) -> np.ndarray :
+    # int64 ns the buckets are cut on: local wall time for calendar units, the stored (UTC) value otherwise
+    index = pd.DatetimeIndex(index)
+    if index.tz is not None and _calendar(unit) :
+        index = index.tz_localize(None)
+    return index.asi8
+
+def _floor (ns, count: int, unit: str, offset: int = 0) -> np.ndarray :
+    # Bucket start (same clock as ns) of every ns
+    ns = np.asarray(ns, dtype=np.int64) - offset
+    if unit == 'mo' :
+        months = ns.view('M8[ns]').astype('M8[M]').astype(np.int64)
+        return (months // count * count).astype('M8[M]').astype('M8[ns]').view(np.int64) + offset
+    width = count * _SECONDS[unit] * 10**9
+    origin = _MONDAY if unit == 'wk' else 0
+    return (ns - origin) // width * width + origin + offset
+
+def _next (start, count: int, unit: str, offset: int = 0) :
+    # Start of the bucket after the one starting at start
+    if unit == 'mo' :
+        months = np.asarray(start - offset, dtype=np.int64).view('M8[ns]').astype('M8[M]')
+        return int((months + count).astype('M8[ns]').view(np.int64)) + offset
+    return start + count * _SECONDS[unit] * 10**9
+
+def _labels (starts: np.ndarray, tz, unit: str) -> pd.DatetimeIndex :
+    # Bucket starts back to timestamps in the timezone of the input
+    index = pd.DatetimeIndex(np.asarray(starts, dtype=np.int64).view('M8[ns]'))
+    if tz is None :
+        return index
+    if _calendar(unit) :
+        return index.tz_localize(tz, ambiguous=True, nonexistent='shift_forward')
+    return index.tz_localize('UTC').tz_convert(tz)
+
+def _reduce (columns: dict, first: np.ndarray) -> dict :
+    # Aggregates every column over the groups starting at the row positions first
+    n = len(next(iter(columns.values())))
+    last = np.r_[first[1:] - 1, n - 1]
+    out = {}
+    for col, values in columns.items() :
+        how = AGGREGATIONS[col]
+        if how == 'first' :
+            out[col] = values[first]
+        elif how == 'last' :
+            out[col] = values[last]
+        elif how == 'max' :
+            out[col] = np.maximum.reduceat(values, first)
+        elif how == 'min' :
+            out[col] = np.minimum.reduceat(values, first)
+        else :
+            out[col] = np.add.reduceat(values, first)
+    return out
+
+def _offset_ns (offset) -> int :
+    return 0 if offset is None else pd.Timedelta(offset).value
+
+def resample_bars (df: pd.DataFrame, interval: str, offset=None) -> pd.DataFrame :
+    '''
+    Coarse OHLCV bars of df (sorted DatetimeIndex), labelled by the bucket start like yfinance.
+    Only the OHLCV columns present are kept. offset shifts the bucket grid, e.g. offset='30min'
+    for hourly bars starting at 9:30.
+    '''
+    count, unit = parse_interval(interval)
+    columns = {col: df[col].to_numpy() for col in AGGREGATIONS if col in df.columns}
+    if len(df) == 0 :
+        return pd.DataFrame(columns, index=df.index[:0])
+    starts = _floor(_clock(df.index, unit), count, unit, _offset_ns(offset))
+    if np.any(starts[1:] < starts[:-1]) :
+        raise ValueError('resample_bars needs a sorted index')
+    first = np.flatnonzero(np.r_[True, starts[1:] != starts[:-1]])
+    return pd.DataFrame(_reduce(columns, first), index=_labels(starts[first], df.index.tz, unit))
+
+def timeframe_context (index: pd.DatetimeIndex, coarse: pd.DataFrame, interval: str, offset=None) -> pd.DataFrame :
+    '''
+    Values of the coarse bars (built with the same interval / offset) aligned on the fine bars of index.
+    A fine bar sees the last coarse bar completed before its own bucket, e.g. a daily close shows from the
+    first bar of the next day, so nothing of the running bucket leaks into the fine loop. NaN before the first one.
+    '''
+    count, unit = parse_interval(interval)
+    offset = _offset_ns(offset)
+    starts = _floor(_clock(index, unit), count, unit, offset)
+    coarse_starts = _floor(_clock(coarse.index, unit), count, unit, offset)
+    # Number of coarse buckets starting strictly before the fine bar's bucket, minus one
+    pos = np.searchsorted(coarse_starts, starts, side='left') - 1
+    out = {}
+    for col in coarse.columns :
+        values = coarse[col].to_numpy(dtype=float)
+        out[col] = np.where(pos >= 0, values[np.maximum(pos, 0)], np.nan)
+    return pd.DataFrame(out, index=index)
+
+class BarAggregator () :
+    '''
+    Incremental OHLCV aggregation, the last bucket stays open until a bar of a later bucket arrives.
+    - update(timestamp, bar): bar by bar, returns the completed coarse (timestamp, bar) or None
+    - update_frame(df): chunk by chunk (vectorized), returns the DataFrame of completed coarse bars
+    - flush(): the open bucket at the end of the data, None if there is none
+    Both feeding styles give the bars of resample_bars on the concatenated input.
+    '''
+
+    def __init__ (self, interval: str, offset=None) :
+        self.interval = interval
+        self.count, self.unit = parse_interval(interval)
+        self.offset = _offset_ns(offset)
+        self._start = None  # open bucket start (bucket clock)
+        self._end = None  # its end as a stored timestamp value, for the per-bar check
+        self._bar = None
+        self._tz = None
+
+    def _open (self, start: int) :
+        self._start = start
+        end = _next(start, self.count, self.unit, self.offset)
+        # Only calendar buckets of tz-aware bars need the (slow) local -> UTC conversion
+        self._end = _labels([end], self._tz, self.unit)[0].value if self._tz is not None and _calendar(self.unit) else end
+
+    def _label (self) :
+        if self._tz is not None and _calendar(self.unit) :
+            return _labels([self._start], self._tz, self.unit)[0]
+        return pd.Timestamp(self._start, tz='UTC').tz_convert(self._tz) if self._tz is not None else pd.Timestamp(self._start)
+
+    def update (self, timestamp, bar: dict) :
+        if not isinstance(timestamp, pd.Timestamp) :
+            timestamp = pd.Timestamp(timestamp)
+        if self._bar is not None and timestamp.value < self._end :
+            current = self._bar
+            for col, how in AGGREGATIONS.items() :
+                if col in current :
+                    value = bar[col]
+                    if how == 'max' :
+                        current[col] = max(current[col], value)
+                    elif how == 'min' :
+                        current[col] = min(current[col], value)
+                    elif how == 'last' :
+                        current[col] = value
+                    elif how == 'sum' :
+                        current[col] += value
+            return None
+        completed = self.flush()
+        if self._tz is None :
+            self._tz = timestamp.tz
+        clock = timestamp.tz_localize(None).value if timestamp.tz is not None and _calendar(self.unit) else timestamp.value
+        self._open(int(_floor(clock, self.count, self.unit, self.offset)))
+        self._bar = {col: bar[col] for col in AGGREGATIONS if col in bar}
+        return completed
+
+    def update_frame (self, df: pd.DataFrame) -> pd.DataFrame :
+        if len(df) == 0 :
+            return resample_bars(df, self.interval)
+        if self._tz is None :
+            self._tz = df.index.tz
+        columns = {col: df[col].to_numpy() for col in AGGREGATIONS if col in df.columns}
+        starts = _floor(_clock(df.index, self.unit), self.count, self.unit, self.offset)
+        if self._bar is not None :
+            # The open bucket goes in front as one pre-aggregated row, every aggregation is associative
+            starts = np.r_[self._start, starts]
+            columns = {col: np.r_[self._bar[col], values] for col, values in columns.items()}
+        if np.any(starts[1:] < starts[:-1]) :
+            raise ValueError('BarAggregator needs bars in time order')
+        first = np.flatnonzero(np.r_[True, starts[1:] != starts[:-1]])
+        bars = _reduce(columns, first)
+        # Last bucket stays open
+        self._open(int(starts[first[-1]]))
+        self._bar = {col: values[-1].item() for col, values in bars.items()}
+        done = {col: values[:-1] for col, values in bars.items()}
+        return pd.DataFrame(done, index=_labels(starts[first[:-1]], self._tz, self.unit))
+
+    def flush (self) :
+        if self._bar is None :
+            return None
+        completed = (self._label(), self._bar)
+        self._bar = None
+        return completed
@@ -0,0 +1,83 @@
+'''
+Parallel parameter sweeps over EmaCrossStrategy / ArimaTickStrategy grids.
+Market data is loaded once and handed to every worker process a single time.
+'''
+
+from utils import *
+from backtest_engine import *
+from tradeanalysis import *
+from parallel import run_tasks, worker_state, market_state, build_strategy
+import itertools
+import time
+
+def param_grid (**params) -> list :
+    # Cartesian product of the given value lists, e.g. param_grid(short_window=[10, 20], long_window=[50, 100])
+    keys = list(params)
+    return [dict(zip(keys, values)) for values in itertools.product(*params.values())]
+
+def _run_one (task) :
+    task_id, params = task
+    state = worker_state()
+    strategy_cls, market, settings = state['strategy_cls'], state['market'], state['settings']
+    row = {'task_id': task_id, **params}
+    start = time.perf_counter()
+    try:
+        # Failures are reported in the 'error' column
+        strategy = build_strategy(strategy_cls, market, settings['amount'], settings['fixed'], params)
+        strategy.run_backtest(**settings['run_kwargs'])
+        if len(strategy.trade_performance) > 0:
+            ta = TradeAnalysis(
+                trade_performance=strategy.trade_performance,
+                capital=settings['amount'],
+                cost_per_trade=settings['cost_per_trade'],
+                slippage=settings['slippage'],
+                price_series=strategy.data['Close']
+            )
+            row.update(ta.metrics(settings['risk_free']))
+        else:
+            row['total_trade'] = 0
+        row['error'] = None
+    except Exception as e:
+        row['error'] = f'{type(e).__name__}: {e}'
+    row['elapsed'] = time.perf_counter() - start
+    return row
+
+def run_sweep (strategy_cls, market: FinancialData, grid: list, amount: float,
+               fixed: dict = None, run_kwargs: dict = None,
+               cost_per_trade: float = 0, slippage: float = 0, risk_free: float = 0.02,
+               processes: int = None, chunksize: int = None, progress_every: int = 100) -> pd.DataFrame :
+    '''
+    Runs strategy_cls once per parameter set of grid and collects TradeAnalysis metrics.
+    - market: FinancialData (or strategy) whose .data is shared read-only with the workers
+    - fixed: constructor arguments common to every run, run_kwargs: passed to run_backtest
+    - processes: pool size (default all cores, 1 runs in-process), chunksize: tasks per dispatch
+    - a failing run (e.g. ARIMA fit error) gives a row with 'error' set instead of stopping the sweep
+    - progress_every: progress line every that many runs, logged at INFO on the backtest logger,
+      so only shown after enable_logging()
+    '''
+    settings = {
+        'amount': amount,
+        'fixed': fixed or {},
+        'run_kwargs': run_kwargs or {},
+        'cost_per_trade': cost_per_trade,
+        'slippage': slippage,
+        'risk_free': risk_free
+    }
+    state = {'strategy_cls': strategy_cls, 'market': market_state(market), 'settings': settings}
+    tasks = list(enumerate(grid))
+
+    rows, errors = [], 0
+    start = time.perf_counter()
+
+    def collect (row) :
+        nonlocal errors
+        rows.append(row)
+        errors += row['error'] is not None
+        if progress_every and (len(rows) % progress_every == 0 or len(rows) == len(tasks)):
+            elapsed = time.perf_counter() - start
+            logger.info(f'[INFO] Sweep : {len(rows)}/{len(tasks)} done | {errors} errors | {elapsed:.1f}s')
+
+    for row in run_tasks(_run_one, tasks, state, processes, chunksize):
+        collect(row)
+
+    return pd.DataFrame(rows).sort_values('task_id').set_index('task_id')
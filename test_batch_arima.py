@@ -0,0 +1,19 @@
+import numpy as np
+import pytest
+from batch_arima import batch_forecast
+from ema_arima import fit_arima, arima_forecast
+from indicators import indicator_cache
+
+# Returns have a 1% std, CLS vs MLE differences stay within a few percent of it on 200-bar windows
+MEAN_TOL = 2.5e-4
+BOUNDS_TOL = 5e-4
+
+@pytest.mark.parametrize('order', [(1, 0, 0), (2, 0, 0), (1, 1, 0)])
+def test_batch_forecast_matches_statsmodels (bars, order) :
+    y = indicator_cache.get('log_ret', bars(1200, seed=5)['Close'].to_numpy())
+    windows = np.stack([y[end - 199:end + 1] for end in range(200, 1200, 50)])
+    mean, lower, upper = batch_forecast(windows, order, alpha=0.2)
+    expected = np.array([arima_forecast(fit_arima(window, order), 0.2) for window in windows])
+    assert np.abs(mean - expected[:, 0]).max() < MEAN_TOL
+    assert np.abs(lower - expected[:, 1]).max() < BOUNDS_TOL
+    assert np.abs(upper - expected[:, 2]).max() < BOUNDS_TOL
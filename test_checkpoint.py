@@ -0,0 +1,70 @@
+import datetime as dt
+import os
+import pytest
+from checkpoint import Checkpoint, resume
+from ema_arima import EmaCrossStrategy, ArimaTickStrategy
+from journal import TradeJournal
+
+class _Crash (Exception) :
+    pass
+
+def _ema (data) :
+    return EmaCrossStrategy('X', dt.date(2024, 1, 1), 100, '1d', 10_000, short_window=5, long_window=20, data=data)
+
+def _arima (data, batched=False) :
+    return ArimaTickStrategy('X', dt.date(2024, 1, 1), 100, '1d', 10_000, window=60, refit_every=7,
+                             long_threshold=0.0002, short_threshold=0.0002, data=data, batched=batched)
+
+STRATEGIES = {
+    'ema': (_ema, 600, 377, 50),
+    'arima': (_arima, 260, 181, 25),
+    'arima_batched': (lambda data : _arima(data, batched=True), 400, 263, 25),
+}
+
+def _interrupt (strategy, path, every, crash_at) :
+    # Checkpointed run killed at the start of bar crash_at
+    strategy.checkpoint = Checkpoint(path, every)
+    save = strategy.checkpoint.maybe_save
+    def maybe_save (s, index) :
+        if index == crash_at :
+            raise _Crash
+        save(s, index)
+    strategy.checkpoint.maybe_save = maybe_save
+    with pytest.raises(_Crash) :
+        strategy.run_backtest()
+    return strategy.checkpoint.saves
+
+def _assert_same_run (resumed, clean) :
+    assert len(clean.trade_performance) > 0
+    assert (resumed.trade_performance.records == clean.trade_performance.records).all()
+    assert resumed.current_balance == clean.current_balance
+
+@pytest.mark.parametrize('name', list(STRATEGIES))
+def test_resume_matches_uninterrupted_run (tmp_path, bars, name) :
+    make, n, crash_at, every = STRATEGIES[name]
+    data = bars(n, seed=1)
+    clean = make(data)
+    clean.run_backtest()
+    assert _interrupt(make(data), str(tmp_path), every, crash_at) >= 3
+    _assert_same_run(resume(make(data), str(tmp_path), every), clean)
+
+def test_resume_drops_journal_past_state (tmp_path, bars, monkeypatch) :
+    # Crash between the journal append and the state swap of the fourth save
+    data = bars(600, seed=1)
+    clean = _ema(data)
+    clean.run_backtest()
+    strategy = _ema(data)
+    strategy.checkpoint = Checkpoint(str(tmp_path), 50)
+    replace = os.replace
+    def crashing_replace (src, dst) :
+        if strategy.checkpoint.saves == 3 :
+            raise _Crash
+        replace(src, dst)
+    monkeypatch.setattr(os, 'replace', crashing_replace)
+    with pytest.raises(_Crash) :
+        strategy.run_backtest()
+    monkeypatch.undo()
+    saved = strategy.checkpoint.load()['journal_size']
+    assert os.path.getsize(strategy.checkpoint.journal_file) > saved * TradeJournal.dtype.itemsize
+    resumed = resume(_ema(data), str(tmp_path), 50)
+    _assert_same_run(resumed, clean)
@@ -0,0 +1,36 @@
+import numpy as np
+import pandas as pd
+from data_cache import DataCache, _slice
+
+class _Provider () :
+    # Business-day bars, counts the calls
+    def __init__ (self) :
+        index = pd.bdate_range('2020-01-01', periods=200)
+        self.df = pd.DataFrame({col: np.arange(200.0) + 1 for col in ['Open', 'High', 'Low', 'Close', 'Volume']}, index=index)
+        self.calls = []
+
+    def fetch (self, ticker, start, end, interval) :
+        self.calls.append((start, end))
+        return _slice(self.df, start, end)
+
+def test_weekend_gap_is_covered (tmp_path) :
+    provider = _Provider()
+    cache = DataCache(str(tmp_path), provider=provider)
+    cache.get('X', '2020-01-06', '2020-03-02', '1d')
+    cache.get('X', '2020-01-04', '2020-03-02', '1d')  # Saturday -> Monday answers nothing
+    calls = len(provider.calls)
+    cache.get('X', '2020-01-04', '2020-03-02', '1d')
+    assert len(provider.calls) == calls
+    offline = DataCache(str(tmp_path), provider=provider, offline=True)
+    assert len(offline.get('X', '2020-01-04', '2020-03-02', '1d')) == 40
+
+def test_empty_answer_past_cached_data_is_asked_again (tmp_path) :
+    provider = _Provider()
+    cache = DataCache(str(tmp_path), provider=provider)
+    cache.get('X', '2020-01-06', '2020-03-02', '1d')
+    cache.get('X', '2020-01-06', '2021-06-01', '1d')
+    provider.df = provider.df.iloc[:0]
+    cache.get('X', '2021-06-01', '2021-06-10', '1d')
+    calls = len(provider.calls)
+    cache.get('X', '2021-06-01', '2021-06-10', '1d')
+    assert len(provider.calls) == calls + 1
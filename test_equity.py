@@ -0,0 +1,64 @@
+import datetime as dt
+import numpy as np
+import pandas as pd
+import pytest
+from ema_arima import EmaCrossStrategy
+from fills import FillModel
+from feeds import frame_feed
+from tick_store import TickStore
+
+def _bars (bars) :
+    return bars(800, freq='h', tz='UTC')
+
+def _strategy (data, fill_model=None) :
+    strategy = EmaCrossStrategy('X', dt.date(2024, 1, 1), 100, '1h', 10_000, short_window=5, long_window=20, data=data)
+    strategy.fill_model = fill_model
+    return strategy
+
+def _reference (strategy, close, index) :
+    # Bar by bar account: open PnL net of the entry commission while held, net PnL once closed
+    equity = np.full(len(close), float(strategy.initial_balance))
+    for r in strategy.trade_performance.records :
+        entry = index.get_loc(pd.Timestamp(r['entry_date'], tz='UTC'))
+        exit_ = index.get_loc(pd.Timestamp(r['exit_date'], tz='UTC'))
+        entry_fees = strategy.fill_model.fees(r['units'], r['entry_price']) if strategy.fill_model is not None else 0.0
+        equity[entry:exit_] += r['side'] * r['units'] * (close[entry:exit_] - r['entry_price']) - entry_fees
+        equity[exit_:] += r['pnl']
+    return equity
+
+@pytest.mark.parametrize('fill_model', [None, FillModel(commission=5, commission_bps=10, slippage_bps=5)])
+def test_equity_curve_matches_reference (bars, fill_model) :
+    strategy = _strategy(_bars(bars), fill_model)
+    strategy.run_backtest()
+    curve = strategy.equity_curve()
+    expected = _reference(strategy, strategy.data['Close'].to_numpy(), strategy.data.index)
+    assert np.allclose(curve['equity'].to_numpy(), expected, rtol=0, atol=1e-6)
+
+def test_entry_fee_counted_from_entry_bar (bars) :
+    strategy = _strategy(_bars(bars), FillModel(commission=7))
+    strategy.build_arrays()
+    strategy.enter_long(10)
+    curve = strategy.equity_curve()
+    close = strategy.bars.close[11]
+    expected = strategy.initial_balance + strategy.position['units'] * (close - strategy.position['entry_price']) - 7
+    assert curve['equity'].iloc[11] == pytest.approx(expected)
+    assert curve['equity'].iloc[10] == strategy.initial_balance
+
+def test_equity_curve_tick_store (tmp_path, bars) :
+    data = _bars(bars)
+    stored = _strategy(TickStore.from_frame(str(tmp_path), data), FillModel(commission=1))
+    stored.run_backtest(chunk_size=97)
+    curve = stored.equity_curve(chunk_size=50)
+    assert len(stored.trade_performance) > 0
+    assert curve.index.equals(data.index)
+    assert np.allclose(curve['equity'].to_numpy(), _reference(stored, data['Close'].to_numpy(), data.index), rtol=0, atol=1e-6)
+    assert curve.equals(stored.equity_curve(chunk_size=len(data)))
+
+def test_equity_curve_refused_after_stream (bars) :
+    strategy = _strategy(_bars(bars))
+    strategy.run_stream(frame_feed(strategy.data))
+    with pytest.raises(ValueError) :
+        strategy.equity_curve()
+    strategy.reset()
+    strategy.run_backtest()
+    assert len(strategy.equity_curve()) == len(strategy.data)
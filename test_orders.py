@@ -0,0 +1,44 @@
+import datetime as dt
+import pytest
+from backtest_engine import EventBased
+from fills import FillModel
+
+def _engine (bars, amount, allow_negative_balance=True) :
+    # Constant 3500 Volume, a 1% participation caps entries at 35 units
+    data = bars(50, spread=0.01, volume=3500)
+    engine = EventBased('X', dt.date(2021, 1, 1), 100, '1d', amount, allow_negative_balance, data=data)
+    engine.build_arrays()
+    return engine
+
+def _fill_buy_limit (engine, units=None) :
+    # Buy limit above the bar High, triggered on bar 5
+    engine.place_order('limit', 1, engine.bars['High'][5] * 1.05, units=units)
+    engine.process_orders(5)
+
+def test_pending_entry_respects_participation (bars) :
+    engine = _engine(bars, 10_000_000)
+    engine.fill_model = FillModel(participation=0.01)
+    _fill_buy_limit(engine)
+    assert engine.position['units'] == 35
+    assert len(engine.order_book) == 0
+
+def test_pending_entry_explicit_units_capped (bars) :
+    engine = _engine(bars, 10_000)
+    engine.fill_model = FillModel(participation=0.01)
+    _fill_buy_limit(engine, units=1000)
+    assert engine.position['units'] == 35
+
+def test_pending_entry_refused_without_capital (bars) :
+    engine = _engine(bars, -500, allow_negative_balance=False)
+    _fill_buy_limit(engine)
+    assert engine.position['side'] is None
+    assert engine.current_balance == -500
+    assert engine.buy_trades == 0
+    assert len(engine.order_book) == 0
+
+def test_pending_entry_fees (bars) :
+    engine = _engine(bars, 10_000)
+    engine.fill_model = FillModel(commission=2.0)
+    _fill_buy_limit(engine, units=10)
+    assert engine.entry_fees == pytest.approx(2.0)
+    assert engine.current_balance == pytest.approx(10_000 - 10 * engine.position['entry_price'] - 2.0)
@@ -0,0 +1,27 @@
+from ema_arima import ArimaSignal
+from feeds import frame_feed
+from portfolio import Portfolio
+
+class _BrokenModel :
+    def extend (self, y) :
+        raise ValueError('broken model')
+
+class _BrokenOnce (ArimaSignal) :
+    # The model update of bar 70 fails, like a statsmodels error on one symbol
+    def on_bar (self, timestamp, bar) :
+        if self.returns.count == 70 :
+            self._model = _BrokenModel()
+        return super().on_bar(timestamp, bar)
+
+def test_arima_signal_refits_when_update_fails (bars) :
+    signal = _BrokenOnce(window=60, refit_every=20)
+    targets = [signal.on_bar(timestamp, bar) for timestamp, bar in frame_feed(bars(100, seed=1))]
+    assert targets[70] is not None
+    assert not isinstance(signal._model, _BrokenModel)
+
+def test_portfolio_survives_a_failed_update (bars) :
+    portfolio = Portfolio({'A': frame_feed(bars(150, seed=1)), 'B': frame_feed(bars(150, seed=2))},
+                          {'A': ArimaSignal(window=60, refit_every=20), 'B': _BrokenOnce(window=60, refit_every=20)},
+                          10_000)
+    journals = portfolio.run()
+    assert len(journals['A']) > 0 and len(journals['B']) > 0
@@ -0,0 +1,32 @@
+import asyncio
+import datetime as dt
+from ema_arima import EmaCrossStrategy, ArimaTickStrategy
+from feeds import frame_feed, replay_feed
+
+def _assert_same_run (strategy, **kwargs) :
+    strategy.run_backtest(**kwargs)
+    expected = strategy.trade_performance.records.copy(), strategy.current_balance
+    strategy.reset()
+    strategy.run_stream(frame_feed(strategy.data))
+    assert len(expected[0]) > 0
+    assert (strategy.trade_performance.records == expected[0]).all()
+    assert strategy.current_balance == expected[1]
+
+def test_ema_stream_matches_backtest (bars) :
+    _assert_same_run(EmaCrossStrategy('X', dt.date(2024, 1, 1), 100, '1d', 10_000, short_window=5, long_window=20,
+                                      data=bars(600)))
+
+def test_arima_stream_matches_backtest (bars) :
+    strategy = ArimaTickStrategy('X', dt.date(2024, 1, 1), 100, '1d', 10_000, window=60, refit_every=20,
+                                 long_threshold=0.0002, short_threshold=0.0002, data=bars(260, seed=1))
+    _assert_same_run(strategy)
+
+def test_arima_stream_async (bars) :
+    strategy = ArimaTickStrategy('X', dt.date(2024, 1, 1), 100, '1d', 10_000, window=60, refit_every=20,
+                                 long_threshold=0.0002, short_threshold=0.0002, data=bars(200, seed=1))
+    strategy.run_backtest()
+    expected = strategy.trade_performance.records.copy()
+    strategy.reset()
+    asyncio.run(strategy.run_stream_async(replay_feed(frame_feed(strategy.data))))
+    assert len(expected) > 0
+    assert (strategy.trade_performance.records == expected).all()
@@ -0,0 +1,24 @@
+import datetime as dt
+import pytest
+from ema_arima import EmaCrossStrategy
+from fills import FillModel
+from tick_store import TickStore
+
+def _strategy (data, fill_model=None) :
+    strategy = EmaCrossStrategy('X', dt.date(2024, 1, 1), 100, '1h', 10_000, short_window=5, long_window=20, data=data)
+    strategy.fill_model = fill_model
+    return strategy
+
+@pytest.mark.parametrize('chunk_size', [137, 2, 1_000_000])
+@pytest.mark.parametrize('fill_model', [None, FillModel(commission=1, slippage_bps=5)])
+def test_store_run_matches_in_memory (tmp_path, bars, chunk_size, fill_model) :
+    # Decisions at the last bar of a chunk still fill at the Open of the first bar of the next one
+    data = bars(1000, freq='h', tz='UTC')
+    memory = _strategy(data, fill_model)
+    memory.run_backtest()
+    # Same bars as the in-memory run, which drops the first one (no log return)
+    stored = _strategy(TickStore.from_frame(str(tmp_path), memory.data[['Open', 'High', 'Low', 'Close', 'Volume']]), fill_model)
+    stored.run_backtest(chunk_size=chunk_size)
+    assert len(memory.trade_performance) > 0
+    assert (stored.trade_performance.records == memory.trade_performance.records).all()
+    assert stored.current_balance == memory.current_balance
@@ -0,0 +1,16 @@
+import datetime as dt
+import pandas as pd
+from ema_arima import EmaCrossStrategy
+from tradeanalysis import TradeAnalysis
+
+def test_metrics_from_journal_match_frame (bars) :
+    strategy = EmaCrossStrategy('X', dt.date(2024, 1, 1), 100, '1d', 10_000, short_window=5, long_window=20, data=bars(800))
+    strategy.run_backtest()
+    journal = TradeAnalysis(strategy.trade_performance, 10_000, 0, 0, strategy.data['Close'])
+    frame = TradeAnalysis(strategy.trade_performance.to_frame(), 10_000, 0, 0, strategy.data['Close'])
+    metrics, expected = journal.metrics(), frame.metrics()
+    # The journal is scored directly, its DataFrame view is only built when asked for
+    assert journal._frame is None
+    assert metrics.keys() == expected.keys()
+    assert all(metrics[key] == expected[key] or (pd.isna(metrics[key]) and pd.isna(expected[key])) for key in metrics)
+    assert journal.trade_performance.equals(frame.trade_performance)
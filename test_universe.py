@@ -0,0 +1,44 @@
+import numpy as np
+import pandas as pd
+import pytest
+from backtest_engine import FinancialData
+from data_cache import DataCache
+from universe import load_universe
+
+class _Provider () :
+    # Local fake provider, no network
+    def __init__ (self, fail: dict = None) :
+        self.fail = dict(fail or {})
+        self.calls = {}
+
+    def fetch (self, ticker, start, end, interval) :
+        self.calls[ticker] = self.calls.get(ticker, 0) + 1
+        if self.calls[ticker] <= self.fail.get(ticker, 0) :
+            raise ConnectionError('rate limited')
+        n = 10 + len(ticker)
+        index = pd.date_range('2020-01-01', periods=n)
+        return pd.DataFrame({col: np.arange(n, dtype=float) for col in ['Open', 'High', 'Low', 'Close', 'Volume']}, index=index)
+
+class _Offline () :
+    def fetch (self, *args) :
+        raise AssertionError('network provider called')
+
+def test_retries_and_ragged_alignment () :
+    provider = _Provider(fail={'AB': 1, 'ABC': 5})
+    universe = load_universe(['A', 'AB', 'ABC', 'A'], '2020-01-01', '2021-01-01', '1d', provider=provider,
+                             retries=2, backoff=0.0)
+    assert universe.tickers == ['A', 'AB']
+    assert list(universe.errors) == ['ABC']
+    assert provider.calls == {'A': 1, 'AB': 2, 'ABC': 3}
+    index, arrays = universe.aligned('inner')
+    assert len(index) == 11 and arrays['Close'].shape == (11, 2)
+    index, arrays = universe.aligned('outer')
+    assert len(index) == 12 and np.isnan(arrays['Close']).sum() == 1
+
+def test_explicit_provider_wins_over_global_cache (tmp_path, monkeypatch) :
+    monkeypatch.setattr(FinancialData, 'cache', DataCache(str(tmp_path), provider=_Offline()))
+    provider = _Provider()
+    universe = load_universe(['A'], '2020-01-01', '2021-01-01', '1d', provider=provider)
+    assert len(universe) == 1 and provider.calls == {'A': 1}
+    with pytest.raises(ValueError) :
+        load_universe(['A'], '2020-01-01', '2021-01-01', '1d', provider=provider, cache=FinancialData.cache)
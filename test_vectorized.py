@@ -0,0 +1,48 @@
+import datetime as dt
+import pytest
+from ema_arima import EmaCrossStrategy
+from fills import FillModel
+
+def _strategy (data, amount=10_000, allow_negative_balance=True, fill_model=None) :
+    strategy = EmaCrossStrategy('X', dt.date(2024, 1, 1), 100, '1d', amount, short_window=5, long_window=20,
+                                allow_negative_balance=allow_negative_balance, data=data)
+    strategy.fill_model = fill_model
+    return strategy
+
+def _run (strategy, **kwargs) :
+    strategy.reset()
+    strategy.run_backtest(**kwargs)
+    return (strategy.trade_performance.records.copy(), strategy.current_balance,
+            strategy.buy_trades, strategy.sell_trades, strategy.close_trades)
+
+def _assert_parity (strategy, **kwargs) :
+    loop = _run(strategy, **kwargs)
+    vectorized = _run(strategy, vectorized=True, **kwargs)
+    assert len(loop[0]) > 0
+    assert (loop[0] == vectorized[0]).all()
+    assert loop[1:] == vectorized[1:]
+
+def test_parity (bars) :
+    _assert_parity(_strategy(bars(1500)))
+
+def test_parity_without_negative_balance (bars) :
+    # Small account, a few trades then entries get refused once the balance is below the price
+    strategy = _strategy(bars(1500, seed=6), amount=200, allow_negative_balance=False)
+    _assert_parity(strategy)
+    assert strategy.current_balance < strategy.data['Open'].min()
+
+def test_parity_equal_emas (bars) :
+    strategy = _strategy(bars(1500, seed=2, flat=60))
+    assert (strategy.data['ema_short'] == strategy.data['ema_long']).any()
+    _assert_parity(strategy)
+
+@pytest.mark.parametrize('start, stop', [(0, 700), (300, None), (250, 900)])
+def test_parity_start_stop (bars, start, stop) :
+    _assert_parity(_strategy(bars(1500, seed=3)), start=start, stop=stop)
+
+@pytest.mark.parametrize('fill_model', [FillModel(commission=1, commission_bps=5, slippage_bps=10, spread_bps=4),
+                                        FillModel(participation=0.02),
+                                        FillModel(slippage_bps=80, participation=0.5, commission=2)])
+@pytest.mark.parametrize('allow_negative_balance', [True, False])
+def test_parity_fill_model (bars, fill_model, allow_negative_balance) :
+    _assert_parity(_strategy(bars(1500, seed=4), allow_negative_balance=allow_negative_balance, fill_model=fill_model))
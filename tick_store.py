@@ -0,0 +1,81 @@
+'''
+Memory-mapped columnar storage for tick/bar histories larger than RAM.
+One raw binary file per column plus a JSON header, columns are opened with np.memmap
+so only the slices being read are paged in.
+'''
+
+from utils import *
+import json
+import os
+
+class TickStore () :
+    '''
+    Columnar bar store on disk.
+    - timestamp: int64 nanoseconds (UTC when the index is tz-aware, the timezone is kept in the header)
+    - any other column with its own dtype, e.g. float32 Volume and float64 prices
+    - append() writes at the end of each column file, nothing already written is rewritten
+    '''
+
+    def __init__ (self, path: str) :
+        self.path = path
+        with open(os.path.join(path, 'meta.json')) as f :
+            self.meta = json.load(f)
+        self._open_columns()
+
+    @classmethod
+    def create (cls, path: str, dtypes: dict, tz: str = None) :
+        # dtypes: column name -> NumPy dtype name, 'timestamp' is added as int64
+        os.makedirs(path, exist_ok=True)
+        meta = {'length': 0, 'tz': tz, 'columns': {'timestamp': 'int64', **{k: np.dtype(v).name for k, v in dtypes.items()}}}
+        for name in meta['columns'] :
+            open(os.path.join(path, f'{name}.bin'), 'wb').close()
+        with open(os.path.join(path, 'meta.json'), 'w') as f :
+            json.dump(meta, f)
+        return cls(path)
+
+    @classmethod
+    def from_frame (cls, path: str, df: pd.DataFrame, dtypes: dict = None) :
+        # dtypes defaults to float64 for every numeric column of df
+        columns = [col for col in df.columns if pd.api.types.is_numeric_dtype(df[col])]
+        dtypes = {col: (dtypes or {}).get(col, 'float64') for col in columns}
+        store = cls.create(path, dtypes, tz=str(df.index.tz) if getattr(df.index, 'tz', None) is not None else None)
+        store.append(df)
+        return store
+
+    def _open_columns (self) :
+        n = self.meta['length']
+        self.columns = {}
+        for name, dtype in self.meta['columns'].items() :
+            file = os.path.join(self.path, f'{name}.bin')
+            self.columns[name] = np.memmap(file, dtype=dtype, mode='r', shape=(n,)) if n > 0 else np.empty(0, dtype=dtype)
+
+    def append (self, df: pd.DataFrame) :
+        if len(df) == 0 :
+            return
+        index = pd.DatetimeIndex(df.index)
+        for name, dtype in self.meta['columns'].items() :
+            values = index.asi8 if name == 'timestamp' else df[name].to_numpy()
+            with open(os.path.join(self.path, f'{name}.bin'), 'ab') as f :
+                f.write(np.ascontiguousarray(values, dtype=dtype).tobytes())
+        self.meta['length'] += len(df)
+        with open(os.path.join(self.path, 'meta.json'), 'w') as f :
+            json.dump(self.meta, f)
+        self._open_columns()
+
+    def __len__ (self) :
+        return self.meta['length']
+
+    def index (self, start: int, stop: int) -> pd.DatetimeIndex :
+        index = pd.DatetimeIndex(self.columns['timestamp'][start:stop].view('M8[ns]'))
+        if self.meta['tz'] is not None :
+            index = index.tz_localize('UTC').tz_convert(self.meta['tz'])
+        return index
+
+    def read (self, start: int, stop: int) :
+        # Index plus memory-mapped column views for rows [start, stop)
+        columns = {name: values[start:stop] for name, values in self.columns.items() if name != 'timestamp'}
+        return self.index(start, stop), columns
+
+    def to_frame (self, start: int = 0, stop: int = None) -> pd.DataFrame :
+        index, columns = self.read(start, len(self) if stop is None else stop)
+        return pd.DataFrame({name: np.asarray(values) for name, values in columns.items()}, index=index)
@@ -1,4 +1,5 @@
 from utils import *
+from journal import *
 
 class TradeAnalysis():
     '''
@@ -8,136 +9,213 @@ class TradeAnalysis():
     '''
 
 
-    def __init__(self, trade_performance: dict, capital: int, cost_per_trade: float, slippage: float, price_series: pd.Series):
-        if isinstance(trade_performance, pd.DataFrame):
-            self.trade_performance = trade_performance.copy()
+    def __init__(self, trade_performance: TradeJournal, capital: int, cost_per_trade: float, slippage: float, price_series: pd.Series,
+                 equity_curve: pd.Series = None, periods_per_year: int = 252):
+        # Journal kept as given, metrics read its columns directly (no DataFrame round-trip)
+        if isinstance(trade_performance, TradeJournal):
+            self.journal = trade_performance
+        elif isinstance(trade_performance, pd.DataFrame):
+            self.journal = trade_performance.copy()
         else:
-            self.trade_performance = pd.DataFrame.from_dict(trade_performance, orient='index')
+            self.journal = pd.DataFrame.from_dict(trade_performance, orient='index')
+        self._frame = None
         self.capital = capital
         self.cost_per_trade = cost_per_trade
         self.slippage = slippage
         self.price_series = price_series
+        self.equity_curve = equity_curve  # bar-level equity, e.g. EventBased.equity_curve()['equity']
+        self.periods_per_year = periods_per_year  # bars per year for the bar-level ratios (252 for daily bars)
+        self._metrics = {}
 
-    def _prepare_df(self) -> pd.DataFrame:
-        df = self.trade_performance.copy()
-        if 'Log Return' in df.columns:
-            df = df.rename(columns={'Log Return': 'log_returns'})
-            df = convert_to_simple_returns(df)
-        if self.slippage != 0:
-            df['simple_returns'] -= self.slippage
-        if self.cost_per_trade != 0:
-            df['simple_returns'] -= self.cost_per_trade / self.capital
-        if 'simple_returns' in df.columns:
-            df['Net Log Return'] = np.log(1 + df['simple_returns'])
-        return df
+    @property
+    def trade_performance(self) -> pd.DataFrame:
+        # DataFrame view of the journal, built on first use (plots, custom analysis)
+        if self._frame is None:
+            self._frame = self.journal.to_frame() if isinstance(self.journal, TradeJournal) else self.journal
+        return self._frame
+
+    SUMMARY = ['nbr_long', 'nbr_short', 'total_trade', 'avg_period_trade', 'avg_profit', 'avg_net_profit', 'pnl']
 
     def df_analysis(self) -> pd.Series:
-        df = self._prepare_df()
-        nbr_long = (df['Type of trade'] == 'long').sum()
-        nbr_short = (df['Type of trade'] == 'short').sum()
-        total_trade = len(df)
-        avg_period_trade = df['Duration'].mean()
-        avg_profit = df['Performance [%]'].mean()
-        avg_net_profit = df['PnL'].mean() if 'PnL' in df.columns else 0
-        pnl = df['Capital After Trade'].iloc[-1] - self.capital if total_trade > 0 and 'Capital After Trade' in df.columns else 0.0
-        summary = {
-            'nbr_long': nbr_long,
-            'nbr_short': nbr_short,
-            'total_trade': total_trade,
-            'avg_period_trade': avg_period_trade,
-            'avg_profit': avg_profit,
-            'avg_net_profit': avg_net_profit,
-            'pnl': pnl
-        }
-        return pd.Series(summary)
+        metrics = self.metrics()
+        return pd.Series({key: metrics[key] for key in self.SUMMARY})
 
     def max_drawdown(self) -> tuple:
         # Max drawdown and recovery time
-        df = self.trade_performance.copy()
-        if 'Capital After Trade' not in df.columns:
-            return 0.0, pd.NaT
-
-        df['equity'] = df['Capital After Trade']
-        df['cummax'] = df['equity'].cummax()
-        df['drawdown'] = (df['equity'] / df['cummax']) - 1
-        df['drawdown'] = df['drawdown'].clip(lower=-1.0)
-
-        max_dd = df['drawdown'].min()
-
-        recovery = pd.NaT
-        if max_dd < 0:
-            trough = df['drawdown'].idxmin()
-            peak_idx = df.loc[:trough, 'equity'].idxmax()
-            after = df.loc[trough:]
-            if not after.empty:
-                recov_idx = after[after['equity'] >= df.loc[peak_idx, 'equity']].index.min()
-                if pd.notna(recov_idx):
-                    recovery = recov_idx - peak_idx
-
-        return max_dd, recovery
+        metrics = self.metrics()
+        return metrics['max_drawdown'], metrics['recovery']
 
     def sharpe_ratio(self, risk_free: float) -> float:
-        df = self.trade_performance.copy()
-        if 'PnL' not in df.columns:
-            return 0.0
-        df['return_on_initial'] = df['PnL'] / self.capital
-        excess_returns = df['return_on_initial'] - (risk_free / 252)
-        return np.sqrt(252) * excess_returns.mean() / excess_returns.std(ddof=1) if excess_returns.std(ddof=1) != 0 else 0.0
+        return self.metrics(risk_free)['sharpe']
 
     def sortino_ratio(self, risk_free: float) -> float:
-        df = self.trade_performance.copy()
-        if 'PnL' not in df.columns:
-            return 0.0
-        df['return_on_initial'] = df['PnL'] / self.capital
-        excess_returns = df['return_on_initial'] - (risk_free / 252)
-        downside = excess_returns[excess_returns < 0]
-        denom = downside.std(ddof=1)
-        return np.sqrt(252) * excess_returns.mean() / denom if denom != 0 else 0.0
+        return self.metrics(risk_free)['sortino']
 
     def gain_loss_stats(self) -> dict:
-        df = self.trade_performance.copy()
-        if 'PnL' not in df.columns:
-            return {'win_rate': 0, 'gain_loss_ratio': 0}
-        wins = df[df['PnL'] > 0]['PnL']
-        losses = df[df['PnL'] <= 0]['PnL']
-        win_rate = len(wins) / len(df) if len(df) > 0 else 0
-        avg_win = wins.mean() if len(wins) > 0 else 0
-        avg_loss = abs(losses.mean()) if len(losses) > 0 else 1
-        gain_loss_ratio = avg_win / avg_loss if avg_loss != 0 else 0
-        return {'win_rate': win_rate, 'gain_loss_ratio': gain_loss_ratio}
+        metrics = self.metrics()
+        return {'win_rate': metrics['win_rate'], 'gain_loss_ratio': metrics['gain_loss_ratio']}
 
     def kelly_criterion(self) -> float:
-        df = self.trade_performance.copy()
-        if 'PnL' not in df.columns:
-            return 0.0
-        wins = df[df['PnL'] > 0]['PnL']
-        losses = df[df['PnL'] <= 0]['PnL']
-        if len(wins) == 0 or len(losses) == 0:
-            return 0.0
-        p = len(wins) / len(df)
-        q = 1 - p
-        avg_win = wins.mean()
-        avg_loss = abs(losses.mean())
-        R = avg_win / avg_loss
-        kelly_fraction = p - (q / R)
-        return max(kelly_fraction, 0.0)
+        return self.metrics()['kelly']
+
+    def metrics(self, risk_free: float = 0.02) -> dict:
+        # Every statistic shown by report() from one pass over the journal, cached per risk_free
+        if risk_free not in self._metrics:
+            row = self.batch_metrics([self.journal], self.capital, risk_free).iloc[0]
+            self._metrics[risk_free] = row.to_dict()
+            if self.equity_curve is not None:
+                self._metrics[risk_free].update(self.equity_metrics(risk_free))
+        return self._metrics[risk_free]
+
+    def equity_metrics(self, risk_free: float = 0.02) -> dict:
+        # Time-based Sharpe / Sortino / drawdown on the bar-level equity curve, intra-trade moves included
+        equity = np.asarray(self.equity_curve, dtype=float)
+        periods = self.periods_per_year
+        with np.errstate(divide='ignore', invalid='ignore'):
+            excess = equity[1:] / equity[:-1] - 1 - risk_free / periods
+            std = excess.std(ddof=1) if len(excess) > 1 else np.nan
+            downside = excess[excess < 0]
+            down_std = downside.std(ddof=1) if len(downside) > 1 else np.nan
+            sharpe = np.sqrt(periods) * excess.mean() / std if std != 0 else 0.0
+            sortino = np.sqrt(periods) * excess.mean() / down_std if down_std != 0 else 0.0
+        max_dd, recovery = self._drawdown(equity, self.equity_curve.index) if len(equity) > 0 else (0.0, pd.NaT)
+        return {'bar_sharpe': sharpe, 'bar_sortino': sortino, 'bar_max_drawdown': max_dd, 'bar_recovery': recovery}
+
+    @staticmethod
+    def _journal_arrays(journal) -> dict:
+        # NumPy columns of a TradeJournal or of a journal DataFrame (to_frame / legacy dict layout)
+        if isinstance(journal, TradeJournal):
+            rec = journal.records
+            return {'long': rec['side'] == 1, 'duration': rec['exit_date'] - rec['entry_date'],
+                    'perf': rec['log_return'] * 100, 'pnl': rec['pnl'], 'capital': rec['capital'],
+                    'index': journal.dates()}
+        if not isinstance(journal, pd.DataFrame):
+            journal = pd.DataFrame.from_dict(journal, orient='index')
+        if len(journal) == 0:
+            journal = TradeJournal().to_frame()
+        return {'long': (journal['Type of trade'] == 'long').to_numpy(),
+                'duration': pd.to_timedelta(journal['Duration']).to_numpy().view('i8'),
+                'perf': journal['Performance [%]'].to_numpy(dtype=float),
+                'pnl': journal['PnL'].to_numpy(dtype=float),
+                'capital': journal['Capital After Trade'].to_numpy(dtype=float),
+                'index': journal.index}
+
+    @staticmethod
+    def _drawdown(equity: np.ndarray, index) -> tuple:
+        # Max drawdown of an equity series and the time from its peak to the recovery of that peak
+        with np.errstate(divide='ignore', invalid='ignore'):
+            drawdown = np.maximum(equity / np.maximum.accumulate(equity) - 1, -1.0)
+        if np.isnan(drawdown).all():
+            return np.nan, pd.NaT
+        trough = int(np.nanargmin(drawdown))
+        max_dd = drawdown[trough]
+        recovery = pd.NaT
+        if max_dd < 0:
+            peak = int(np.argmax(equity[:trough + 1]))
+            recovered = np.flatnonzero(equity[trough:] >= equity[peak])
+            if len(recovered) > 0:
+                recovery = index[trough + recovered[0]] - index[peak]
+        return max_dd, recovery
+
+    @staticmethod
+    def batch_metrics(journals: list, capital: float, risk_free: float = 0.02) -> pd.DataFrame:
+        '''
+        Scores many journals at once, one row per journal with the report() statistics.
+        Journals are concatenated and every sum/mean/std is a segmented NumPy reduction,
+        only the drawdown (a running max) is walked journal by journal.
+        '''
+        arrays = [TradeAnalysis._journal_arrays(journal) for journal in journals]
+        n_seg = len(arrays)
+        sizes = np.array([len(a['pnl']) for a in arrays], dtype=int)
+        seg = np.repeat(np.arange(n_seg), sizes)
+        cols = {key: np.concatenate([a[key] for a in arrays]) if n_seg else np.empty(0)
+                for key in ('long', 'duration', 'perf', 'pnl', 'capital')}
+        pnl = cols['pnl']
+
+        def seg_sum(values, where=None):
+            if where is None:
+                return np.bincount(seg, weights=values, minlength=n_seg)
+            return np.bincount(seg[where], weights=values[where], minlength=n_seg)
+
+        def seg_std(values, mean, count, where=None):
+            # Sample std (ddof=1), NaN below two observations like pandas
+            values = values if where is None else values[where]
+            idx = seg if where is None else seg[where]
+            sq = np.bincount(idx, weights=(values - mean[idx]) ** 2, minlength=n_seg)
+            return np.where(count > 1, np.sqrt(sq / np.maximum(count - 1, 1)), np.nan)
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            count = sizes.astype(float)
+            nbr_long = np.bincount(seg, weights=cols['long'], minlength=n_seg).astype(int)
+            avg_duration = seg_sum(cols['duration'].astype(float)) / count
+            avg_profit = seg_sum(cols['perf']) / count
+            avg_net_profit = seg_sum(pnl) / count
+            last = np.maximum(np.cumsum(sizes) - 1, 0)
+            final_capital = cols['capital'][last] if len(pnl) else np.zeros(n_seg)
+            final_pnl = np.where(sizes > 0, final_capital - capital, 0.0)
+
+            # Sharpe / Sortino on PnL relative to the initial capital
+            excess = pnl / capital - risk_free / 252
+            excess_mean = seg_sum(excess) / count
+            excess_std = seg_std(excess, excess_mean, count)
+            sharpe = np.where(excess_std != 0, np.sqrt(252) * excess_mean / excess_std, 0.0)
+            down = excess < 0
+            down_count = np.bincount(seg[down], minlength=n_seg).astype(float)
+            down_mean = seg_sum(excess, down) / down_count
+            down_std = seg_std(excess, down_mean, down_count, down)
+            sortino = np.where(down_std != 0, np.sqrt(252) * excess_mean / down_std, 0.0)
+
+            # Win rate, gain/loss ratio and Kelly fraction
+            win = pnl > 0
+            nbr_win = np.bincount(seg[win], minlength=n_seg).astype(float)
+            nbr_loss = count - nbr_win
+            win_rate = np.where(count > 0, nbr_win / count, 0.0)
+            avg_win = np.where(nbr_win > 0, seg_sum(pnl, win) / nbr_win, 0.0)
+            avg_loss = np.where(nbr_loss > 0, np.abs(seg_sum(pnl, ~win) / nbr_loss), 1.0)
+            gain_loss_ratio = np.where(avg_loss != 0, avg_win / avg_loss, 0.0)
+            kelly = win_rate - (1 - win_rate) / (avg_win / avg_loss)
+            kelly = np.where((nbr_win > 0) & (nbr_loss > 0), np.maximum(kelly, 0.0), 0.0)
+
+            max_dd = np.zeros(n_seg)
+            recovery = [pd.NaT] * n_seg
+            for k, a in enumerate(arrays):
+                if len(a['capital']) > 0:
+                    max_dd[k], recovery[k] = TradeAnalysis._drawdown(a['capital'], a['index'])
+
+        return pd.DataFrame({
+            'nbr_long': nbr_long,
+            'nbr_short': sizes - nbr_long,
+            'total_trade': sizes,
+            'avg_period_trade': pd.to_timedelta(avg_duration, unit='ns'),
+            'avg_profit': avg_profit,
+            'avg_net_profit': avg_net_profit,
+            'pnl': final_pnl,
+            'sharpe': sharpe,
+            'sortino': sortino,
+            'max_drawdown': max_dd,
+            'recovery': recovery,
+            'win_rate': win_rate,
+            'gain_loss_ratio': gain_loss_ratio,
+            'kelly': kelly
+        })
 
     def report(self, risk_free: float = 0.02):
-        summary = self.df_analysis()
-        sharpe = self.sharpe_ratio(risk_free)
-        sortino = self.sortino_ratio(risk_free)
-        max_dd, recovery = self.max_drawdown()
-        gl_stats = self.gain_loss_stats()
-        kelly = self.kelly_criterion()
+        metrics = self.metrics(risk_free)
+        summary = pd.Series({key: metrics[key] for key in self.SUMMARY})
         print('=== Strategy Report ===')
         print(summary)
-        print(f"\nSharpe Ratio (corrected): {sharpe:.2f}")
-        print(f"Sortino Ratio: {sortino:.2f}")
-        print(f"Max Drawdown: {max_dd:.2%}")
-        print(f"Recovery Time: {recovery}")
-        print(f"Win Rate: {gl_stats['win_rate']:.2%}")
-        print(f"Gain/Loss Ratio: {gl_stats['gain_loss_ratio']:.2f}")
-        print(f"Kelly Fraction: {kelly:.2f}")
+        print(f"\nSharpe Ratio (corrected): {metrics['sharpe']:.2f}")
+        print(f"Sortino Ratio: {metrics['sortino']:.2f}")
+        print(f"Max Drawdown: {metrics['max_drawdown']:.2%}")
+        print(f"Recovery Time: {metrics['recovery']}")
+        print(f"Win Rate: {metrics['win_rate']:.2%}")
+        print(f"Gain/Loss Ratio: {metrics['gain_loss_ratio']:.2f}")
+        print(f"Kelly Fraction: {metrics['kelly']:.2f}")
+        if self.equity_curve is not None:
+            print(f"Sharpe Ratio (bar level): {metrics['bar_sharpe']:.2f}")
+            print(f"Sortino Ratio (bar level): {metrics['bar_sortino']:.2f}")
+            print(f"Max Drawdown (bar level): {metrics['bar_max_drawdown']:.2%}")
+            print(f"Recovery Time (bar level): {metrics['bar_recovery']}")
 
     def plot_performance(self):
         if self.trade_performance.empty:
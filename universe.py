@@ -0,0 +1,106 @@
+'''
+Concurrent loading of ticker universes, separate from strategy construction.
+Fetches (network, DataCache or local files) run in a bounded thread pool driven by asyncio, with retries
+and exponential backoff, and come back per ticker (ragged) or aligned on one index as 2D arrays.
+'''
+
+from utils import *
+from data_cache import OHLCV, YFinanceProvider
+from backtest_engine import FinancialData
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
+
+class Universe () :
+    '''
+    Bars of many tickers loaded together.
+    - frames: ticker -> OHLCV DataFrame on its own index (ragged), usable as data= of any strategy
+    - errors: ticker -> error message of the tickers that could not be loaded (or came back empty)
+    - aligned(): one index plus column -> (bars, tickers) arrays, e.g. for a cross-sectional loop
+    '''
+
+    def __init__ (self, frames: dict, errors: dict) :
+        self.frames = frames
+        self.errors = errors
+        self.tickers = list(frames)
+
+    def __len__ (self) :
+        return len(self.frames)
+
+    def aligned (self, how: str = 'inner', columns: list = OHLCV) -> tuple :
+        # inner: bars every ticker has, outer: union of the indexes, NaN where a ticker has no bar
+        if how not in ('inner', 'outer') :
+            raise ValueError("how must be 'inner' or 'outer'")
+        index = None
+        for df in self.frames.values() :
+            if index is None :
+                index = df.index
+            else :
+                index = index.intersection(df.index) if how == 'inner' else index.union(df.index)
+        index = pd.DatetimeIndex([]) if index is None else index
+        arrays = {col: np.full((len(index), len(self.tickers)), np.nan) for col in columns}
+        for k, ticker in enumerate(self.tickers) :
+            df = self.frames[ticker]
+            pos = index.get_indexer(df.index)
+            keep = pos >= 0
+            for col in columns :
+                arrays[col][pos[keep], k] = df[col].to_numpy()[keep]
+        return index, arrays
+
+async def _fetch (loop, pool, semaphore, fetch, ticker, start, end, interval, retries, backoff, timeout) :
+    # One ticker, the semaphore is only held during a call so backoff sleeps do not block other tickers
+    for attempt in range(retries + 1) :
+        try :
+            async with semaphore :
+                call = loop.run_in_executor(pool, fetch, ticker, start, end, interval)
+                df = await (asyncio.wait_for(call, timeout) if timeout is not None else call)
+            return ticker, df, None
+        except Exception as e :
+            if attempt == retries :
+                return ticker, None, f'{type(e).__name__}: {e}' if str(e) else type(e).__name__
+            delay = backoff * 2 ** attempt
+            logger.warning(f'[WARN] {ticker} fetch failed ({e}), retry {attempt + 1}/{retries} in {delay:.2f}s')
+            await asyncio.sleep(delay)
+
+async def load_universe_async (tickers: list, start, end, interval: str, provider=None, cache=None,
+                               max_concurrency: int = 8, retries: int = 2, backoff: float = 1.0,
+                               timeout: float = None) -> Universe :
+    '''
+    Loads every ticker of [start, end) at interval, at most max_concurrency fetches at a time.
+    - cache: DataCache, fetches go through its provider and only the missing ranges are downloaded
+    - provider: called directly, FileProvider or any object with the same fetch for offline runs / tests
+    - with neither, FinancialData.cache (shared with the strategies) when set, else YFinanceProvider;
+      an explicit provider always wins over FinancialData.cache, passing both raises
+    - a failed fetch is retried after backoff, 2 * backoff, 4 * backoff ... seconds, timeout bounds each call
+    '''
+    if max_concurrency < 1 :
+        raise ValueError('max_concurrency must be >= 1')
+    if cache is not None and provider is not None :
+        raise ValueError('Pass either provider or cache, a cache fetches through its own provider')
+    if cache is None and provider is None :
+        cache = FinancialData.cache
+    if cache is not None :
+        fetch = cache.get
+    else :
+        fetch = (provider if provider is not None else YFinanceProvider()).fetch
+    tickers = list(dict.fromkeys(tickers))
+    loop = asyncio.get_running_loop()
+    semaphore = asyncio.Semaphore(max_concurrency)
+    with ThreadPoolExecutor(max_workers=max_concurrency) as pool :
+        results = await asyncio.gather(*(_fetch(loop, pool, semaphore, fetch, ticker, start, end, interval,
+                                                retries, backoff, timeout) for ticker in tickers))
+    frames, errors = {}, {}
+    for ticker, df, error in results :
+        if error is None and len(df) == 0 :
+            error = 'no data'
+        if error is not None :
+            logger.warning(f'[WARN] {ticker} not loaded: {error}')
+            errors[ticker] = error
+            continue
+        df = df[[col for col in OHLCV if col in df.columns]]
+        frames[ticker] = df[~df.index.duplicated(keep='last')].sort_index()
+    logger.info(f'[INFO] Loaded {len(frames)}/{len(tickers)} tickers')
+    return Universe(frames, errors)
+
+def load_universe (tickers: list, start, end, interval: str, **kwargs) -> Universe :
+    # Blocking version of load_universe_async, for scripts outside an event loop
+    return asyncio.run(load_universe_async(tickers, start, end, interval, **kwargs))
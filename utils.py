@@ -4,10 +4,68 @@ Utility functions and imports for the framework.
 
 import numpy as np
 import pandas as pd
-import matplotlib.pyplot as plt
-import yfinance as yf
-import quantstats as qs
 import datetime as dt
+import importlib
+import logging
+import sys
+import warnings
+
+class LazyImport () :
+    '''
+    Placeholder for a heavy module (or one of its attributes) imported on first use,
+    so the engine core only loads numpy/pandas. Attribute access, assignment and calls
+    are forwarded to the real object, e.g. plt.subplots(), yf.download, ARIMA(y, order=...).
+    '''
+
+    def __init__ (self, module: str, attr: str = None, on_load=None) :
+        object.__setattr__(self, '_spec', (module, attr, on_load))
+        object.__setattr__(self, '_target', None)
+
+    def _load (self) :
+        target = object.__getattribute__(self, '_target')
+        if target is None :
+            module, attr, on_load = object.__getattribute__(self, '_spec')
+            target = importlib.import_module(module)
+            if attr is not None :
+                target = getattr(target, attr)
+            if on_load is not None :
+                on_load()
+            object.__setattr__(self, '_target', target)
+        return target
+
+    def __getattr__ (self, name) :
+        return getattr(self._load(), name)
+
+    def __setattr__ (self, name, value) :
+        setattr(self._load(), name, value)
+
+    def __call__ (self, *args, **kwargs) :
+        return self._load()(*args, **kwargs)
+
+    def __repr__ (self) :
+        module, attr, _ = object.__getattribute__(self, '_spec')
+        return f'<LazyImport {module}{"." + attr if attr else ""}>'
+
+def _silence_statsmodels () :
+    # ConvergenceWarning is not exported, a LazyImport proxy is not a class for filterwarnings / except
+    from statsmodels.tools.sm_exceptions import ConvergenceWarning
+    warnings.filterwarnings('ignore', category=ConvergenceWarning)
+
+plt = LazyImport('matplotlib.pyplot')
+yf = LazyImport('yfinance')
+qs = LazyImport('quantstats')
+train_test_split = LazyImport('sklearn.model_selection', 'train_test_split')
+ARIMA = LazyImport('statsmodels.tsa.arima.model', 'ARIMA', on_load=_silence_statsmodels)
+
+# Engine messages (orders, balances, model stats) are silent until enable_logging() is called
+logger = logging.getLogger('backtest')
+
+def enable_logging (level: int = logging.INFO) :
+    handler = logging.StreamHandler(sys.stdout)
+    handler.setFormatter(logging.Formatter('%(message)s'))
+    logger.handlers = [handler]
+    logger.setLevel(level)
+    logger.propagate = False
 
 def convert_to_simple_returns (df: pd.DataFrame) -> pd.DataFrame :
     df['simple_returns'] = np.exp(df['log_returns']) -1
@@ -17,12 +75,6 @@ def convert_to_log_returns (df: pd.DataFrame) -> pd.DataFrame :
     df['log_returns'] = np.log(df['simple_returns'] +1)
     return df
 
-
-from sklearn.model_selection import train_test_split
-from statsmodels.tsa.arima.model import ARIMA
-from statsmodels.tools.sm_exceptions import ConvergenceWarning
-import warnings
-warnings.filterwarnings('ignore', category=ConvergenceWarning)
 warnings.filterwarnings('ignore', message='.*No supported index is available.*')
 warnings.filterwarnings('ignore', message='.*no associated frequency information.*')
 warnings.filterwarnings('ignore', message='Non-stationary starting autoregressive parameters')
@@ -31,7 +83,9 @@ warnings.filterwarnings('ignore', message='No frequency information was provided
 __all__ = [
     'np','plt','pd', 'yf','dt','qs',
     'warnings',
-    'ConvergenceWarning',
+    'logging',
+    'logger',
+    'enable_logging',
     'convert_to_simple_returns',
     'convert_to_log_returns',
     'ARIMA',
@@ -0,0 +1,127 @@
+'''
+Walk-forward optimisation of EmaCrossStrategy / ArimaTickStrategy parameters.
+Each train window picks the best parameter set, which is then traded on the following
+test window; the test windows are stitched into one out-of-sample journal.
+'''
+
+from utils import *
+from backtest_engine import *
+from tradeanalysis import *
+from journal import *
+from sweep import param_grid
+from parallel import run_tasks, worker_state, market_state, build_strategy
+import time
+
+def walk_forward_windows (n: int, train_size: int, test_size: int, anchored: bool = False) -> list :
+    '''
+    (train, test) pairs of bar slices over n bars, test windows follow each other without overlap.
+    - rolling: train is the train_size bars just before the test window
+    - anchored: train always starts at bar 0 and grows with every window
+    '''
+    if train_size < 3 or test_size < 2:
+        raise ValueError('train_size must be >= 3 and test_size >= 2 (one bar to decide, one to fill)')
+    windows, split = [], train_size
+    while split + 1 < n:
+        test_end = min(split + test_size, n)
+        windows.append((slice(0 if anchored else split - train_size, split), slice(split, test_end)))
+        split = test_end
+    return windows
+
+def _train_one (task) :
+    # One parameter set over every train window: the strategy and its indicators are built once
+    task_id, params = task
+    state = worker_state()
+    strategy_cls, market, settings = state['strategy_cls'], state['market'], state['settings']
+    scores = np.full(len(settings['windows']), np.nan)
+    try:
+        strategy = build_strategy(strategy_cls, market, settings['amount'], settings['fixed'], params)
+        journals = []
+        for train, _ in settings['windows']:
+            strategy.reset()
+            strategy.run_backtest(start=train.start, stop=train.stop, **settings['run_kwargs'])
+            journals.append(strategy.trade_performance)
+        metrics = TradeAnalysis.batch_metrics(journals, settings['amount'], settings['risk_free'])
+        scores = metrics[settings['objective']].to_numpy(dtype=float)
+        # A window without trades cannot be the best one
+        scores[metrics['total_trade'].to_numpy() == 0] = np.nan
+        error = None
+    except Exception as e:
+        error = f'{type(e).__name__}: {e}'
+    return task_id, scores, error
+
+def walk_forward (strategy_cls, market: FinancialData, grid: list, amount: float,
+                  train_size: int, test_size: int, anchored: bool = False, objective: str = 'sharpe',
+                  fixed: dict = None, run_kwargs: dict = None, risk_free: float = 0.02,
+                  processes: int = None, chunksize: int = None) -> tuple :
+    '''
+    Walk-forward optimisation over market.data (see walk_forward_windows for the windows).
+    - every parameter set of grid is scored on each train window by the TradeAnalysis metric objective
+      (higher is better), parameter sets are spread over a process pool like run_sweep
+    - the best one of each train window trades the next test window, starting from the balance
+      left by the previous test window; indicators come from the whole series and are causal,
+      so the test window sees no data after its own bars
+    - returns (TradeAnalysis of the stitched out-of-sample journal, DataFrame with one row per window)
+    '''
+    shared = market_state(market)
+    windows = walk_forward_windows(len(shared['data']), train_size, test_size, anchored)
+    if len(windows) == 0:
+        raise ValueError(f'Not enough bars ({len(shared["data"])}) for train_size={train_size}')
+    settings = {
+        'amount': amount,
+        'fixed': fixed or {},
+        'run_kwargs': run_kwargs or {},
+        'risk_free': risk_free,
+        'objective': objective,
+        'windows': windows
+    }
+    state = {'strategy_cls': strategy_cls, 'market': shared, 'settings': settings}
+    tasks = list(enumerate(grid))
+
+    start = time.perf_counter()
+    scores = np.full((len(tasks), len(windows)), np.nan)
+    errors = 0
+
+    def collect (result) :
+        nonlocal errors
+        task_id, task_scores, error = result
+        scores[task_id] = task_scores
+        errors += error is not None
+
+    for result in run_tasks(_train_one, tasks, state, processes, chunksize):
+        collect(result)
+    logger.info(f'[INFO] Walk-forward : {len(tasks)} parameter sets x {len(windows)} windows trained | '
+                f'{errors} errors | {time.perf_counter() - start:.1f}s')
+
+    # Out-of-sample: one strategy object per distinct winner, reused on each of its test windows
+    index = shared['data'].index
+    winners, rows, journals = {}, [], []
+    balance = amount
+    for k, (train, test) in enumerate(windows):
+        column = scores[:, k]
+        if np.all(np.isnan(column)):
+            rows.append({'train_start': index[train.start], 'train_end': index[train.stop - 1],
+                         'test_start': index[test.start], 'test_end': index[test.stop - 1],
+                         f'train_{objective}': np.nan, 'test_trades': 0})
+            continue
+        best = int(np.nanargmax(column))
+        params = grid[best]
+        if best not in winners:
+            winners[best] = build_strategy(strategy_cls, shared, amount, settings['fixed'], params)
+        strategy = winners[best]
+        strategy.reset(balance)
+        strategy.run_backtest(start=test.start, stop=test.stop, **settings['run_kwargs'])
+        balance = strategy.current_balance
+        journals.append(strategy.trade_performance)
+        rows.append({'train_start': index[train.start], 'train_end': index[train.stop - 1],
+                     'test_start': index[test.start], 'test_end': index[test.stop - 1],
+                     **params, f'train_{objective}': column[best], 'test_trades': len(strategy.trade_performance)})
+
+    oos = slice(windows[0][1].start, windows[-1][1].stop)
+    analysis = TradeAnalysis(
+        trade_performance=TradeJournal.concat(journals),
+        capital=amount,
+        cost_per_trade=0,
+        slippage=0,
+        price_series=shared['data']['Close'].iloc[oos]
+    )
+    return analysis, pd.DataFrame(rows)